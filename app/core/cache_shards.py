@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import time
+from bisect import bisect
+from typing import Awaitable, Callable, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import redis.asyncio as redis
+from redis.asyncio.retry import Retry
+from redis.backoff import NoBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from app.core.config import (
+    REDIS_CACHE_NODES, REDIS_CACHE_VNODES, REDIS_CACHE_TIMEOUT, REDIS_CACHE_FAILURE_THRESHOLD,
+    REDIS_CACHE_RETRY_SECONDS, REDIS_MAX_CONNECTIONS,
+)
+from app.core.logger import logger
+from app.core.metrics import CACHE_SHARD_FAILURES, CACHE_SHARD_POOL_EXHAUSTED
+from app.core.redis import LazyRedis
+
+T = TypeVar("T")
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class Shard:
+    """One cache node: a raw-bytes client plus a circuit breaker."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        # Password-free identity: used in logs/metrics and as the ring position
+        self.name = f"{parts.hostname}:{parts.port or 6379}{parts.path or '/0'}"
+        self.client = LazyRedis(
+            url,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_CACHE_TIMEOUT,
+            socket_timeout=REDIS_CACHE_TIMEOUT,
+            socket_connect_timeout=REDIS_CACHE_TIMEOUT,
+            # One immediate retry covers a stale pooled connection; beyond that a
+            # miss is cheaper than waiting on a sick node
+            retry=Retry(NoBackoff(), 1),
+            decode_responses=False,
+        )
+        self.down_until = 0.0
+        self.failures = 0  # consecutive; not reset by tripping, so a failed probe re-trips at once
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def record_failure(self, error: Exception):
+        CACHE_SHARD_FAILURES.labels(self.name).inc()
+        self.failures += 1
+        if self.failures < REDIS_CACHE_FAILURE_THRESHOLD:
+            return
+        if self.available:
+            logger.warning("Cache shard %s is down, serving its keys as misses for %ss: %s",
+                           self.name, REDIS_CACHE_RETRY_SECONDS, error)
+        self.down_until = time.monotonic() + REDIS_CACHE_RETRY_SECONDS
+
+
+class HashRing:
+    """
+    Consistent hashing: each shard owns `vnodes` points on a 64-bit ring and
+    a key belongs to the first point at or after its hash. Adding or removing
+    one of N shards moves only ~1/N of the keys.
+    """
+
+    def __init__(self, shards: list[Shard], vnodes: int):
+        points = sorted(
+            (_point(f"{shard.name}#{i}"), shard) for shard in shards for i in range(vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> Shard:
+        i = bisect(self._hashes, _point(key)) % len(self._hashes)
+        return self._shards[i]
+
+
+# Transcript cache nodes. Empty: the cache lives on the primary (REDIS_URL),
+# next to auth and rate-limit keys, and is read inside the admission script.
+shards = [Shard(url) for url in REDIS_CACHE_NODES]
+ring = HashRing(shards, REDIS_CACHE_VNODES) if shards else None
+
+
+def shard_for(key: str) -> Optional[Shard]:
+    """The cache node that owns `key`, or None when the cache is not sharded."""
+    return ring.shard_for(key) if ring else None
+
+
+def _pool_exhausted(error: Exception) -> bool:
+    # BlockingConnectionPool reports a checkout timeout as ConnectionError("No
+    # connection available."): the shard is busy, not broken
+    return isinstance(error, RedisConnectionError) and isinstance(error.__cause__, asyncio.TimeoutError)
+
+
+async def on_shard(shard: Shard, op: Callable[[redis.Redis], Awaitable[T]], default: T) -> T:
+    """
+    Run `op` on the shard's client; a dead or failing shard yields `default`
+    instead of an error. Only socket/connect failures count towards the
+    breaker; waiting too long for a pooled connection is a miss for this call
+    alone, so a busy shard is not emptied onto upstream.
+    """
+    if not shard.available:
+        return default
+    try:
+        result = await op(shard.client)
+    except (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError) as e:
+        if _pool_exhausted(e):
+            CACHE_SHARD_POOL_EXHAUSTED.labels(shard.name).inc()
+        else:
+            shard.record_failure(e)
+        return default
+    shard.failures = 0
+    return result
+
+
+async def close_shards():
+    for shard in shards:
+        await shard.client.aclose()
@@ -1,11 +1,55 @@
 import os
+import re
+from typing import Optional
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.core.config import POSTGRES_URL
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateIndex
+from app.core.logger import logger
+from app.core.config import POSTGRES_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+from app.core.metrics import instrument_engine
+from app.core.tracing import trace_engine
 
-engine = create_engine(POSTGRES_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+_engine: Optional[Engine] = None
+
+
+def get_engine() -> Engine:
+    """
+    This worker's engine, built on first use (the lifespan, or the first
+    session of a CLI script) rather than at import. Per-worker pool;
+    pre-ping drops connections Postgres closed while idle.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            POSTGRES_URL,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+        instrument_engine(_engine)
+        trace_engine(_engine)
+    return _engine
+
+
+def dispose_engine():
+    """Close the pool; the next get_engine() builds a fresh one."""
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
+
+
+class _SessionFactory(sessionmaker):
+    def __call__(self, **local_kw) -> Session:
+        local_kw.setdefault("bind", get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _SessionFactory(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 def get_db():
@@ -15,12 +59,47 @@ def get_db():
     finally:
         db.close()
 
+def _backfill_indexes():
+    """
+    Create model indexes missing from existing tables. On Postgres they are
+    built CONCURRENTLY (outside a transaction), so a deploy that adds an index
+    to a large, live table such as transcript_audits does not block inserts
+    while it builds. A concurrent build that was interrupted leaves an invalid
+    index behind; it is dropped and rebuilt.
+    """
+    engine = get_engine()
+    indexes = [index for table in Base.metadata.sorted_tables for index in table.indexes]
+    if engine.dialect.name != "postgresql":
+        with engine.begin() as conn:
+            for index in indexes:
+                index.create(bind=conn, checkfirst=True)
+        return
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for index in indexes:
+            valid = conn.execute(
+                text("SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                     "WHERE c.relname = :name"),
+                {"name": index.name},
+            ).scalar()
+            if valid:
+                continue
+            if valid is False:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+            ddl = str(CreateIndex(index).compile(dialect=engine.dialect))
+            conn.execute(text(re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)))
+            logger.info("Built index %s concurrently", index.name)
+
 def init_db():
     """Main entry point for all database schema initializations"""
     # 1. Create tables defined in SQLAlchemy Models
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
+
+    # 2. create_all skips tables that already exist, so add any indexes
+    #    declared on the models after the table was first created
+    _backfill_indexes()
     
-    # 2. Run the custom SQL script for constraints (Guest access, etc.)
+    # 3. Run the custom SQL script for constraints (Guest access, etc.)
     script_path = os.path.join(os.getcwd(), "init_db.sql")
     if os.path.exists(script_path):
         with SessionLocal() as db:
@@ -29,6 +108,6 @@ def init_db():
                     sql = f.read()
                 db.execute(text(sql))
                 db.commit()
-            except Exception as e:
+            except Exception:
                 db.rollback()
-                print(f"❌ Custom SQL Init Failed: {e}")
\ No newline at end of file
+                logger.exception("Custom SQL init (%s) failed", script_path)
\ No newline at end of file
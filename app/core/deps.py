@@ -3,7 +3,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from datetime import datetime, timezone
 from app.utils.security import decode_access_token
-from app.core.redis import r 
+from app.core.token_cache import get_verified_payload, cache_verified_payload, is_revoked
 from app.core.logger import logger
 from typing import Optional
 
@@ -11,12 +11,20 @@ from typing import Optional
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def decode_token_cached(token: str) -> dict:
+    """Decode a JWT, skipping signature verification for tokens seen before."""
+    payload = get_verified_payload(token)
+    if payload is None:
+        payload = decode_access_token(token)
+        cache_verified_payload(token, payload)
+    return payload
+
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Extract current user from JWT, also check if token is revoked.
     """
     try:
-        payload = decode_access_token(token)
+        payload = decode_token_cached(token)
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -24,16 +32,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # ✅ Revocation check
-    token_key = f"revoked:{payload['sub']}:{payload['iat']}"
-    is_revoked = await r.get(token_key)
-    if is_revoked:
+    # ✅ Revocation check (local set, Redis only while pub/sub is down)
+    if await is_revoked(payload):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token has been revoked",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    logger.info(f"Payload Received:{payload}")
+    logger.debug("Authenticated user %s", payload.get("sub"))
     return payload
 
 # --- New Admin Dependency ---
@@ -43,7 +49,7 @@ async def require_admin(current_user: dict = Depends(get_current_user)):
     Enforce that the logged-in user has the 'ADMIN' role.
     """
     role = current_user.get("role")
-    logger.info(f"Current User Role:{role}")
+    logger.debug("Current User Role: %s", role)
     if role != "ADMIN":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -52,15 +58,30 @@ async def require_admin(current_user: dict = Depends(get_current_user)):
     return current_user
 
 
-async def get_optional_user(request: Request) -> Optional[dict]:
+def _bearer_payload(request: Request) -> Optional[dict]:
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         return None
     
     try:
         token = auth_header.split(" ")[1]
-        payload = decode_access_token(token)
-        return payload
+        return decode_token_cached(token)
     except Exception:
         # If token is invalid/expired, we treat them as a guest
-        return None
\ No newline at end of file
+        return None
+
+
+async def get_optional_token(request: Request) -> Optional[dict]:
+    """
+    Like get_optional_user but WITHOUT the revocation check, for routes that
+    fold it into their own Redis round trip (see AdmissionService).
+    """
+    return _bearer_payload(request)
+
+
+async def get_optional_user(request: Request) -> Optional[dict]:
+    payload = _bearer_payload(request)
+    # A revoked (logged-out) token is treated as a guest as well
+    if payload is None or await is_revoked(payload):
+        return None
+    return payload
\ No newline at end of file
@@ -1,9 +1,14 @@
 import os
+import atexit
+import contextvars
+import json
 import logging
+import queue
+import random
 import sys
 import time
 import uuid
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from fastapi import Request
 
 # ---------------------------
@@ -20,11 +25,39 @@ log_file_path = os.path.join(logs_dir, "api.log")
 # Logging Configuration
 # ---------------------------
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" (default) or "json" (one object per line, for log shippers)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+# Fraction of requests whose INFO-level app lines are kept (warnings/errors always are)
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 1.0))
+
+# Per-request context, captured on the calling thread before records are queued
+request_id_var: contextvars.ContextVar[str | None] = contextvars.ContextVar("request_id", default=None)
+log_sampled_var: contextvars.ContextVar[bool] = contextvars.ContextVar("log_sampled", default=True)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "module": f"{record.module}:{record.lineno}",
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
 
 # Detailed format: Timestamp | Level | Module:Line | Message
-formatter = logging.Formatter(
-    "%(asctime)s | %(levelname)s | %(module)s:%(lineno)d | %(message)s"
-)
+if LOG_FORMAT == "json":
+    formatter = JsonFormatter()
+else:
+    formatter = logging.Formatter(
+        "%(asctime)s | %(levelname)s | %(module)s:%(lineno)d | %(message)s"
+    )
 
 # 1. Console Handler (for Docker logs / stdout)
 console_handler = logging.StreamHandler(sys.stdout)
@@ -36,6 +69,33 @@ file_handler = RotatingFileHandler(
 )
 file_handler.setFormatter(formatter)
 
+
+class _RequestContextFilter(logging.Filter):
+    """Tags records with the request ID and drops unsampled per-request INFO lines."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        if record.levelno <= logging.INFO and record.name.startswith("transcripto"):
+            return log_sampled_var.get()
+        return True
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    The stock QueueHandler formats the message on the caller's thread so the
+    record can be pickled. Our queue never leaves the process, so hand the raw
+    record over and let the listener thread do all formatting and I/O.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+queue_handler = _InProcessQueueHandler(_log_queue)
+queue_handler.addFilter(_RequestContextFilter())
+_listener = QueueListener(_log_queue, console_handler, file_handler, respect_handler_level=True)
+
 # ---------------------------
 # Logger Initialization
 # ---------------------------
@@ -43,16 +103,23 @@ def setup_logging():
     # Root logger setup to intercept library logs (uvicorn, sqlalchemy, etc.)
     root_logger = logging.getLogger()
     root_logger.setLevel(LOG_LEVEL)
-    
+
     if not root_logger.hasHandlers():
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
+        # Request threads only enqueue; stdout/file writes happen on the listener thread
+        root_logger.addHandler(queue_handler)
+        _listener.start()
+        atexit.register(stop_logging)
 
     # Specific app logger
     app_logger = logging.getLogger("transcripto")
-    app_logger.info(f"🚀 Logger initialized. Level: {LOG_LEVEL} | File: {log_file_path}")
+    app_logger.info("🚀 Logger initialized. Level: %s | Format: %s | File: %s", LOG_LEVEL, LOG_FORMAT, log_file_path)
     return app_logger
 
+def stop_logging():
+    """Flush queued records and stop the listener thread (safe to call twice)."""
+    if _listener._thread is not None:
+        _listener.stop()
+
 logger = setup_logging()
 
 # ---------------------------
@@ -63,22 +130,21 @@ async def log_requests_middleware(request: Request, call_next):
     Logs every incoming HTTP request, its execution time, and status code.
     """
     request_id = str(uuid.uuid4())
-    start_time = time.time()
-    
+    request_id_var.set(request_id)
+    log_sampled_var.set(LOG_SAMPLE_RATE >= 1.0 or random.random() < LOG_SAMPLE_RATE)
+    start_time = time.perf_counter()
+
     # Log the incoming call
-    logger.info(f"ID: {request_id} | Req: {request.method} {request.url.path}")
+    logger.info("ID: %s | Req: %s %s", request_id, request.method, request.url.path)
 
     try:
         response = await call_next(request)
-        
+
         # Calculate processing time in milliseconds
-        process_time = (time.time() - start_time) * 1000
-        formatted_time = f"{process_time:.2f}ms"
+        process_time = (time.perf_counter() - start_time) * 1000
 
         # Log completion
-        logger.info(
-            f"ID: {request_id} | Res: {response.status_code} | Time: {formatted_time}"
-        )
+        logger.info("ID: %s | Res: %s | Time: %.2fms", request_id, response.status_code, process_time)
 
         # Inject Request ID into headers for frontend debugging
         response.headers["X-Request-ID"] = request_id
@@ -86,6 +152,6 @@ async def log_requests_middleware(request: Request, call_next):
 
     except Exception as e:
         # Log unhandled exceptions that occur during the request
-        process_time = (time.time() - start_time) * 1000
-        logger.error(f"ID: {request_id} | Failed: {str(e)} | Time: {process_time:.2f}ms")
-        raise e
\ No newline at end of file
+        process_time = (time.perf_counter() - start_time) * 1000
+        logger.error("ID: %s | Failed: %s | Time: %.2fms", request_id, e, process_time)
+        raise e
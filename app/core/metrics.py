@@ -0,0 +1,144 @@
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.requests import Request
+
+# With several workers, point PROMETHEUS_MULTIPROC_DIR at an empty, shared,
+# writable directory (wiped on deploy) so /metrics aggregates every process.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# ---------------------------
+# Metric definitions
+# ---------------------------
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+UPSTREAM_FETCH_LATENCY = Histogram(
+    "upstream_fetch_duration_seconds",
+    "YouTube transcript fetch latency by outcome",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS + (20, 30),
+)
+CACHE_REQUESTS = Counter(
+    "transcript_cache_requests_total",
+    "Transcript cache lookups",
+    ["result"],  # hit | miss
+)
+CACHE_SHARD_FAILURES = Counter(
+    "transcript_cache_shard_failures_total",
+    "Cache shard calls that failed on the socket or connect and were served as misses",
+    ["shard"],
+)
+CACHE_SHARD_POOL_EXHAUSTED = Counter(
+    "transcript_cache_shard_pool_exhausted_total",
+    "Cache shard calls served as misses because no pooled connection freed up in time",
+    ["shard"],
+)
+UPSTREAM_PROXY_FETCHES = Counter(
+    "upstream_proxy_fetches_total",
+    "YouTube fetch attempts by egress proxy and outcome",
+    ["proxy", "outcome"],  # ok | error | blocked
+)
+UPSTREAM_PROXY_LATENCY = Histogram(
+    "upstream_proxy_fetch_duration_seconds",
+    "Successful YouTube fetch latency by egress proxy",
+    ["proxy"],
+    buckets=LATENCY_BUCKETS + (20, 30),
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by statement type",
+    ["operation"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+GUEST_LIMIT_REJECTIONS = Counter(
+    "guest_limit_rejections_total",
+    "Guest transcript requests rejected by the daily limit",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total",
+    "Authenticated requests rejected by per-user quotas",
+    ["scope"],
+)
+PASSWORD_HASH_QUEUE = Gauge(
+    "password_hash_queue_depth",
+    "Password hashes waiting for a process-pool slot",
+    multiprocess_mode="livesum",
+)
+EMAIL_OUTBOX_QUEUE = Gauge(
+    "email_outbox_queue_depth",
+    "Emails queued for delivery or still being retried",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_IN_FLIGHT = Gauge(
+    "password_hashes_in_flight",
+    "Password hashes running in the process pool",
+    multiprocess_mode="livesum",
+)
+
+_DB_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+# ---------------------------
+# Helpers
+# ---------------------------
+def observe_request(request: Request, status_code: int, duration: float):
+    # Label by route template (e.g. /admin/users/{user_id}), never the raw path,
+    # so label cardinality stays bounded.
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        str(status_code),
+    ).observe(duration)
+
+def instrument_engine(engine):
+    """Time every SQL statement executed through `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        DB_QUERY_LATENCY.labels(operation if operation in _DB_OPERATIONS else "OTHER").observe(
+            time.perf_counter() - started
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_timer(exception_context):
+        # after_cursor_execute never fires for failed statements
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+def render_metrics() -> tuple[bytes, str]:
+    """Prometheus text exposition for this process, or for all workers in multiprocess mode."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the shared multiprocess directory."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
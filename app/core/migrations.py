@@ -0,0 +1,89 @@
+import hashlib
+import os
+import time
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, select, text
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.database import Base, get_engine, init_db
+from app.core.logger import logger
+
+MIGRATION_LOCK_KEY = 72802
+
+# Bump when bootstrap data (not the schema) changes and must be re-applied
+BOOTSTRAP_VERSION = 1
+
+# Kept outside Base.metadata so it never feeds its own fingerprint
+_state_metadata = MetaData()
+schema_state = Table(
+    "schema_state",
+    _state_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _load_models():
+    # create_all only knows the tables whose models have been imported
+    from app.models import audit, audit_rollup, usage, user  # noqa: F401
+
+
+def schema_fingerprint() -> str:
+    """Hash of the DDL the models compile to, init_db.sql and the bootstrap version."""
+    _load_models()
+    dialect = get_engine().dialect
+    digest = hashlib.sha256(f"bootstrap:{BOOTSTRAP_VERSION}".encode())
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    script_path = os.path.join(os.getcwd(), "init_db.sql")
+    if os.path.exists(script_path):
+        with open(script_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def run_migrations(force: bool = False) -> bool:
+    """
+    Bring the schema and bootstrap data up to date, once per deploy.
+
+    Every caller takes the same Postgres advisory lock, so concurrent workers
+    (or a migrate job racing the first workers) run it one at a time; whoever
+    comes second finds the fingerprint already recorded and returns at once.
+    Returns True when work was actually done.
+    """
+    from app.utils.create_admin import create_initial_admin
+
+    fingerprint = schema_fingerprint()
+    started = time.perf_counter()
+    engine = get_engine()
+    is_postgres = engine.dialect.name == "postgresql"
+
+    # Session-level advisory locks belong to a connection, so hold one for the whole run
+    with engine.connect() as conn:
+        if is_postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()
+        try:
+            _state_metadata.create_all(bind=conn)
+            applied = conn.execute(select(schema_state.c.fingerprint).where(schema_state.c.id == 1)).scalar()
+            conn.commit()
+            if applied == fingerprint and not force:
+                logger.info("Schema up to date (%s), skipping migrations.", fingerprint[:12])
+                return False
+
+            init_db()
+            create_initial_admin()
+
+            conn.execute(schema_state.delete())
+            conn.execute(schema_state.insert().values(id=1, fingerprint=fingerprint))
+            conn.commit()
+        finally:
+            if is_postgres:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+                conn.commit()
+
+    logger.info("✅ Migrations applied (%s) in %.0fms", fingerprint[:12], (time.perf_counter() - started) * 1000)
+    return True
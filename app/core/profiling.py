@@ -0,0 +1,108 @@
+import random
+import time
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import PROFILE_SAMPLE_RATE, PROFILE_INTERVAL, PROFILE_TTL_SECONDS, PROFILE_MAX_REPORTS
+from app.core.deps import decode_token_cached
+from app.core.logger import logger, request_id_var
+from app.core.redis import r
+from app.core.token_cache import is_revoked
+
+PROFILE_HEADER = "X-Profile"
+_INDEX_KEY = "reqprofile:index"
+
+
+def _report_key(request_id: str) -> str:
+    return f"reqprofile:{request_id}"
+
+
+async def _is_admin_request(request: Request) -> bool:
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return False
+    try:
+        payload = decode_token_cached(auth_header.split(" ", 1)[1])
+    except Exception:
+        return False
+    return payload.get("role") == "ADMIN" and not await is_revoked(payload)
+
+
+async def _should_profile(request: Request) -> bool:
+    # Only admins may force a profile; otherwise a random sample (off by default)
+    if request.headers.get(PROFILE_HEADER) == "1":
+        return await _is_admin_request(request)
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+async def profile_if_requested(request: Request, call_next):
+    """
+    Run the request under pyinstrument when asked to (admin header) or when
+    sampled, and keep the report in Redis under the request's X-Request-ID.
+    """
+    if not await _should_profile(request):
+        return await call_next(request)
+
+    from pyinstrument import Profiler  # only loaded when a profile is actually taken
+
+    request_id = request_id_var.get()
+    profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        profiler.stop()
+
+    try:
+        await _store_report(request_id, request, response.status_code, profiler)
+        response.headers["X-Profiled"] = "1"
+    except Exception as e:
+        # Never fail the real request because the diagnostics could not be saved
+        logger.warning("Failed to store profile for request %s: %s", request_id, e)
+    return response
+
+
+async def _store_report(request_id: str, request: Request, status_code: int, profiler):
+    now = time.time()
+    pipe = r.pipeline(transaction=False)
+    pipe.hset(_report_key(request_id), mapping={
+        "method": request.method,
+        "path": request.url.path,
+        "status": status_code,
+        "duration_ms": round(profiler.last_session.duration * 1000, 2),
+        "created_at": now,
+        "text": profiler.output_text(unicode=True, color=False),
+        "html": profiler.output_html(),
+    })
+    pipe.expire(_report_key(request_id), PROFILE_TTL_SECONDS)
+    pipe.zadd(_INDEX_KEY, {request_id: now})
+    # Keep only the newest reports in the index; report hashes expire by TTL
+    pipe.zremrangebyrank(_INDEX_KEY, 0, -PROFILE_MAX_REPORTS - 1)
+    await pipe.execute()
+    logger.info("Stored profile for request %s (%s %s)", request_id, request.method, request.url.path)
+
+
+async def list_reports(limit: int = 50) -> list[dict]:
+    """Newest stored profiles (metadata only)."""
+    request_ids = await r.zrevrange(_INDEX_KEY, 0, limit - 1)
+    pipe = r.pipeline(transaction=False)
+    for request_id in request_ids:
+        pipe.hmget(_report_key(request_id), "method", "path", "status", "duration_ms", "created_at")
+    reports = []
+    for request_id, (method, path, status, duration_ms, created_at) in zip(request_ids, await pipe.execute()):
+        if method is None:  # expired
+            continue
+        reports.append({
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status": int(status),
+            "duration_ms": float(duration_ms),
+            "created_at": float(created_at),
+        })
+    return reports
+
+
+async def get_report(request_id: str, fmt: str = "text") -> Optional[str]:
+    return await r.hget(_report_key(request_id), "html" if fmt == "html" else "text")
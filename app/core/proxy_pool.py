@@ -0,0 +1,166 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar
+from urllib.parse import urlsplit
+
+from app.core.config import UPSTREAM_PROXIES, UPSTREAM_PROXY_COOLDOWN_SECONDS, UPSTREAM_FETCH_RETRIES
+from app.core.logger import logger
+from app.core.metrics import UPSTREAM_PROXY_FETCHES, UPSTREAM_PROXY_LATENCY
+from app.core.tracing import span, KIND_CLIENT
+
+T = TypeVar("T")
+
+DIRECT = "direct"
+# Weight of the newest observation in the latency / error-rate averages
+EWMA_ALPHA = 0.2
+# Assumed latency of an egress with no successful fetch yet, so new ones get tried
+INITIAL_LATENCY = 1.0
+# After a block, a request moves to another egress at most this many times
+MAX_FAILOVERS = 2
+
+# YouTube refusing the egress IP, rather than the video or the network failing
+BLOCKED_ERRORS = ("RequestBlocked", "IpBlocked")
+# Answers about the video itself: the egress worked fine
+VIDEO_ERRORS = ("VideoUnavailable", "TranscriptsDisabled", "NoTranscriptFound")
+
+
+def _outcome(error: Exception) -> str:
+    # Matched by name so the YouTube client stays a lazy import
+    text = f"{type(error).__name__}: {error}"
+    if any(name in text for name in BLOCKED_ERRORS):
+        return "blocked"
+    if any(name in text for name in VIDEO_ERRORS):
+        return "ok"
+    return "error"
+
+
+@dataclass(eq=False)
+class Egress:
+    """One way out to YouTube (a proxy, or the server's own IP) and its health."""
+
+    url: Optional[str]  # None: direct
+    name: str  # credential-free label for logs, metrics and /admin/proxies
+    latency: float = INITIAL_LATENCY  # EWMA of successful fetch time, seconds
+    error_rate: float = 0.0  # EWMA of failed attempts, 0..1
+    in_flight: int = 0
+    cooldown_until: float = 0.0
+    attempts: int = 0
+    errors: int = 0
+    blocks: int = 0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def cost(self) -> float:
+        """Expected time to serve one more fetch: latency, queued work and the odds of failing."""
+        return self.latency * (1 + self.in_flight) / max(1.0 - self.error_rate, 0.05)
+
+    def proxy_config(self):
+        if self.url is None:
+            return None
+        from youtube_transcript_api.proxies import GenericProxyConfig
+
+        return GenericProxyConfig(http_url=self.url, https_url=self.url)
+
+
+def _egress(url: str) -> Egress:
+    if url == DIRECT:
+        return Egress(None, DIRECT)
+    parts = urlsplit(url)
+    return Egress(url, f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname or url)
+
+
+class ProxyPool:
+    """
+    Spreads upstream fetches over UPSTREAM_PROXIES. Each fetch goes to the
+    cheaper of two random healthy egresses (see Egress.cost), so load follows
+    capacity without every worker piling onto the single best proxy.
+    Retries stay on the egress the request was given; a block puts that
+    egress in cooldown and moves the request to another one. Health is
+    tracked per worker process.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.egresses = [_egress(url) for url in urls] or [Egress(None, DIRECT)]
+
+    def _pick(self, exclude: list[Egress]) -> Egress:
+        candidates = [e for e in self.egresses if e not in exclude and not e.cooling_down]
+        if not candidates:
+            # Everything is cooling down: the one closest to recovery beats failing outright
+            remaining = [e for e in self.egresses if e not in exclude] or self.egresses
+            candidates = [min(remaining, key=lambda e: e.cooldown_until)]
+        return min(random.sample(candidates, min(2, len(candidates))), key=Egress.cost)
+
+    def _record(self, egress: Egress, outcome: str, elapsed: float):
+        egress.attempts += 1
+        failed = outcome != "ok"
+        egress.error_rate += EWMA_ALPHA * (failed - egress.error_rate)
+        if not failed:
+            egress.latency += EWMA_ALPHA * (elapsed - egress.latency)
+            UPSTREAM_PROXY_LATENCY.labels(egress.name).observe(elapsed)
+        else:
+            egress.errors += 1
+        if outcome == "blocked":
+            egress.blocks += 1
+            egress.cooldown_until = time.monotonic() + UPSTREAM_PROXY_COOLDOWN_SECONDS
+            logger.warning("Egress %s was blocked upstream, cooling down for %ss",
+                           egress.name, UPSTREAM_PROXY_COOLDOWN_SECONDS)
+        UPSTREAM_PROXY_FETCHES.labels(egress.name, outcome).inc()
+
+    async def fetch(self, fetch: Callable[[object], T], **span_attributes) -> T:
+        """
+        Run the blocking `fetch(proxy_config)` in the default executor through
+        the pool, with retries and block failover. Raises the last error.
+        """
+        loop = asyncio.get_running_loop()
+        tried: list[Egress] = []
+        egress = self._pick(tried)
+        retries = 0
+        while True:
+            egress.in_flight += 1
+            started = time.perf_counter()
+            try:
+                with span("upstream.fetch", kind=KIND_CLIENT, egress=egress.name, **span_attributes):
+                    result = await loop.run_in_executor(None, fetch, egress.proxy_config())
+            except Exception as e:
+                outcome = _outcome(e)
+                error = e
+            else:
+                outcome, error = "ok", None
+            finally:
+                egress.in_flight -= 1
+            self._record(egress, outcome, time.perf_counter() - started)
+
+            if error is None:
+                return result
+            if outcome == "blocked" and len(tried) < MAX_FAILOVERS and len(self.egresses) > len(tried) + 1:
+                tried.append(egress)
+                egress, retries = self._pick(tried), 0
+            elif outcome == "error" and retries < UPSTREAM_FETCH_RETRIES:
+                retries += 1
+            else:
+                raise error
+
+    def snapshot(self) -> list[dict]:
+        """Per-egress health as this worker sees it (for /admin/proxies)."""
+        now = time.monotonic()
+        return [
+            {
+                "proxy": egress.name,
+                "cost": round(egress.cost(), 3),
+                "latency_ewma_ms": round(egress.latency * 1000, 1),
+                "error_rate_ewma": round(egress.error_rate, 3),
+                "in_flight": egress.in_flight,
+                "attempts": egress.attempts,
+                "errors": egress.errors,
+                "blocks": egress.blocks,
+                "cooldown_remaining_s": round(max(0.0, egress.cooldown_until - now), 1),
+            }
+            for egress in self.egresses
+        ]
+
+
+proxy_pool = ProxyPool(UPSTREAM_PROXIES)
@@ -0,0 +1,110 @@
+import math
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+from app.core.config import RATE_LIMITS
+from app.core.deps import get_optional_user
+from app.core.redis import r
+from app.core.metrics import RATE_LIMIT_REJECTIONS
+from app.core.tracing import span
+
+# Token bucket per (scope, user). Uses the Redis server clock so every worker
+# agrees on refill timing. Kept as a Lua function so other scripts (see
+# AdmissionService) can run it inside their own round trip.
+# Returns {allowed, tokens_left, retry_after_s, seconds_until_full} (floats as strings).
+TOKEN_BUCKET_LUA = """
+local function token_bucket(key, capacity, rate, cost)
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens), tostring(retry_after), tostring((capacity - tokens) / rate)}
+end
+"""
+
+# KEYS[1] = bucket hash; ARGV[1] = capacity, ARGV[2] = refill tokens/sec, ARGV[3] = cost
+TOKEN_BUCKET_SCRIPT = TOKEN_BUCKET_LUA + """
+return token_bucket(KEYS[1], tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]))
+"""
+
+_token_bucket = r.register_script(TOKEN_BUCKET_SCRIPT)
+
+
+def limits_for(user: dict) -> tuple[int, int]:
+    """(capacity, period seconds) for the user's role; unknown roles get the USER plan."""
+    return RATE_LIMITS.get(str(user.get("role") or "USER"), RATE_LIMITS["USER"])
+
+
+def quota_headers(capacity: int, tokens, reset) -> dict:
+    return {
+        "X-RateLimit-Limit": str(capacity),
+        "X-RateLimit-Remaining": str(math.floor(float(tokens))),
+        "X-RateLimit-Reset": str(math.ceil(float(reset))),
+    }
+
+
+def rate_limit_exceeded(scope: str, headers: dict, retry_after) -> HTTPException:
+    RATE_LIMIT_REJECTIONS.labels(scope).inc()
+    headers["Retry-After"] = str(max(1, math.ceil(float(retry_after))))
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Rate limit exceeded. Please slow down.",
+        headers=headers,
+    )
+
+
+class RateLimiter:
+    """
+    Reusable per-user quota dependency:
+
+        @router.get("/history", dependencies=[Depends(RateLimiter("history"))])
+
+    Guests are skipped here. /v1/transcripts does not use it: its quota runs
+    inside the admission script (AdmissionService).
+    """
+
+    def __init__(self, scope: str, cost: int = 1):
+        self.scope = scope
+        self.cost = cost
+
+    async def __call__(self, request: Request, current_user: Optional[dict] = Depends(get_optional_user)):
+        if not current_user:
+            return
+
+        capacity, period = limits_for(current_user)
+        with span("rate_limit", scope=self.scope):
+            allowed, tokens, retry_after, reset = await _token_bucket(
+                keys=[f"ratelimit:{self.scope}:{current_user['sub']}"],
+                args=[capacity, capacity / period, self.cost],
+            )
+
+        headers = quota_headers(capacity, tokens, reset)
+        # Picked up by apply_rate_limit_headers, since routes may return their own Response
+        request.state.rate_limit_headers = headers
+
+        if not int(allowed):
+            raise rate_limit_exceeded(self.scope, headers, retry_after)
+
+
+def apply_rate_limit_headers(request: Request, response: Response) -> Response:
+    """Copy the quota headers computed by RateLimiter or admission onto the outgoing response."""
+    headers = getattr(request.state, "rate_limit_headers", None)
+    if headers:
+        response.headers.update(headers)
+    return response
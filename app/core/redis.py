@@ -1,5 +1,81 @@
 import redis.asyncio as redis
 import os
 
+from redis.commands.core import AsyncScript
+
+from app.core.config import REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-r = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+
+class LazyRedis:
+    """
+    A Redis client whose connection pool is built on first use (normally
+    open_redis in the worker's lifespan), not at import. Everything else is
+    forwarded to the real client, so commands, pipelines and scripts work
+    unchanged. aclose() drops the pool; the next use builds a fresh one.
+    """
+
+    def __init__(self, url: str, **pool_options):
+        self._url = url
+        self._pool_options = pool_options
+        self._client = None
+        self._owned = True
+
+    @property
+    def client(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.Redis(
+                connection_pool=redis.BlockingConnectionPool.from_url(self._url, **self._pool_options)
+            )
+        return self._client
+
+    def use(self, client) -> None:
+        """Serve from an existing client (e.g. fakeredis) instead of building a pool."""
+        self._client = client
+        self._owned = False
+
+    def register_script(self, script: str) -> AsyncScript:
+        # Modules register scripts at import; hashing the (UTF-8) body must
+        # not build the pool the way redis.Redis.register_script would
+        return AsyncScript(self, script.encode())
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    async def aclose(self) -> None:
+        if self._client is None or not self._owned:
+            return
+        client, self._client = self._client, None
+        await client.aclose()
+        await client.connection_pool.disconnect()
+
+
+# Bounded per worker: callers wait up to REDIS_POOL_TIMEOUT for a free connection
+# instead of opening new ones without limit.
+r = LazyRedis(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    decode_responses=True,
+)
+
+# Same server, raw bytes: large values (cached transcript bodies) are passed
+# through to the response without a UTF-8 decode/encode round trip
+rb = LazyRedis(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT,
+    decode_responses=False,
+)
+
+
+async def open_redis():
+    """Build this worker's pools and fail fast if Redis is unreachable (also warms one connection)."""
+    await r.ping()
+    await rb.ping()
+
+
+async def close_redis():
+    await r.aclose()
+    await rb.aclose()
@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, Callable, List
+
+from app.core.logger import logger
+
+_tasks: List[asyncio.Task] = []
+
+
+async def _run_periodic(name: str, interval: float, job: Callable[[], Awaitable]):
+    while True:
+        try:
+            await job()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Keep the loop alive; the next tick retries
+            logger.error("❌ Background task '%s' failed: %s", name, e)
+        await asyncio.sleep(interval)
+
+
+def start_periodic(name: str, interval: float, job: Callable[[], Awaitable]):
+    """Run `job` every `interval` seconds for the lifetime of the app (interval <= 0 disables)."""
+    if interval <= 0:
+        logger.info("Background task '%s' disabled.", name)
+        return
+    _tasks.append(asyncio.create_task(_run_periodic(name, interval, job), name=name))
+    logger.info("⏱️ Background task '%s' scheduled every %ss.", name, interval)
+
+
+async def stop_background_tasks():
+    """Cancel every scheduled task and wait for them to unwind."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
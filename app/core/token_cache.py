@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, TOKEN_CACHE_SIZE
+from app.core.logger import logger
+from app.core.redis import r
+from app.core.tracing import span
+
+REVOCATION_CHANNEL = "auth:revocations"
+# Sorted set of every live revocation, "sub:iat" scored by the token's exp, so
+# workers seed their local set without scanning the keyspace
+REVOCATION_INDEX = "auth:revoked"
+_RECONNECT_DELAY = 1.0
+
+# ---------------------------
+# Verified-token cache
+# ---------------------------
+# sha256(token) -> decoded payload; LRU-bounded, entries die at the token's `exp`
+_verified: "OrderedDict[str, dict]" = OrderedDict()
+
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def get_verified_payload(token: str) -> Optional[dict]:
+    """Return the cached payload for an already-verified, unexpired token."""
+    digest = _token_digest(token)
+    payload = _verified.get(digest)
+    if payload is None:
+        return None
+    if payload.get("exp", 0) <= time.time():
+        del _verified[digest]
+        return None
+    _verified.move_to_end(digest)
+    return payload
+
+def cache_verified_payload(token: str, payload: dict):
+    digest = _token_digest(token)
+    _verified[digest] = payload
+    _verified.move_to_end(digest)
+    while len(_verified) > TOKEN_CACHE_SIZE:
+        _verified.popitem(last=False)
+
+# ---------------------------
+# Local revocation set
+# ---------------------------
+# "sub:iat" -> exp. Kept in sync with Redis through pub/sub; while the
+# listener is down we cannot trust it and callers fall back to Redis.
+_revoked: dict[str, int] = {}
+_listener_ready = False
+_listener_task: Optional[asyncio.Task] = None
+
+def revocation_key(payload: dict) -> str:
+    return f"revoked:{payload['sub']}:{payload['iat']}"
+
+def _mark_revoked(member: str, exp: int):
+    _revoked[member] = exp
+    # Prune lazily; the set only ever holds tokens that have not expired yet
+    if len(_revoked) % 256 == 0:
+        now = time.time()
+        for key in [k for k, e in _revoked.items() if e <= now]:
+            del _revoked[key]
+
+def is_revoked_locally(payload: dict) -> Optional[bool]:
+    """True/False when the local set is authoritative, None when Redis must be asked."""
+    if f"{payload['sub']}:{payload['iat']}" in _revoked:
+        return True
+    return False if _listener_ready else None
+
+async def is_revoked(payload: dict) -> bool:
+    revoked = is_revoked_locally(payload)
+    if revoked is None:
+        with span("revocation.check"):
+            revoked = bool(await r.get(revocation_key(payload)))
+    return revoked
+
+async def revoke_token(payload: dict, ttl: int):
+    """Persist the revocation in Redis and broadcast it to every worker."""
+    member = f"{payload['sub']}:{payload['iat']}"
+    pipe = r.pipeline(transaction=False)
+    pipe.set(revocation_key(payload), payload["exp"], ex=ttl)
+    pipe.zadd(REVOCATION_INDEX, {member: payload["exp"]})
+    pipe.zremrangebyscore(REVOCATION_INDEX, "-inf", time.time())
+    # No token outlives this, so neither does anything in the index
+    pipe.expire(REVOCATION_INDEX, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    pipe.publish(REVOCATION_CHANNEL, f"{member}:{payload['exp']}")
+    await pipe.execute()
+    _mark_revoked(member, payload["exp"])
+
+async def _load_existing_revocations():
+    """Seed the local set from the revocation index (tokens are short-lived, so it stays small)."""
+    now = time.time()
+    pipe = r.pipeline(transaction=False)
+    pipe.zremrangebyscore(REVOCATION_INDEX, "-inf", now)
+    pipe.zrangebyscore(REVOCATION_INDEX, now, "+inf", withscores=True)
+    _, revoked = await pipe.execute()
+    for member, exp in revoked:
+        _mark_revoked(member, int(exp))
+
+async def _listen_for_revocations():
+    global _listener_ready
+    while True:
+        pubsub = r.pubsub()
+        try:
+            # Subscribe before seeding so nothing published in between is missed
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            await _load_existing_revocations()
+            _listener_ready = True
+            logger.info("🔐 Revocation listener ready (%s revoked tokens cached).", len(_revoked))
+
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                sub, iat, exp = message["data"].rsplit(":", 2)
+                _mark_revoked(f"{sub}:{iat}", int(exp))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Revocation listener disconnected, falling back to Redis checks: %s", e)
+        finally:
+            _listener_ready = False
+            await pubsub.aclose()
+        await asyncio.sleep(_RECONNECT_DELAY)
+
+def start_revocation_listener():
+    global _listener_task
+    if _listener_task is None:
+        _listener_task = asyncio.create_task(_listen_for_revocations(), name="revocation-listener")
+
+async def stop_revocation_listener():
+    global _listener_task
+    if _listener_task is not None:
+        _listener_task.cancel()
+        await asyncio.gather(_listener_task, return_exceptions=True)
+        _listener_task = None
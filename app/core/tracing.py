@@ -0,0 +1,269 @@
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event
+
+from app.core.config import TRACE_EXPORT_FILE, TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME
+from app.core.logger import logger, request_id_var
+
+# OTLP span kinds
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+# OTLP status codes
+STATUS_OK, STATUS_ERROR = 1, 2
+
+EXPORT_BATCH_SIZE = 100
+EXPORT_FLUSH_SECONDS = 1.0
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans")
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.spans: list[dict] = []
+
+
+_trace_var: contextvars.ContextVar[Optional[_Trace]] = contextvars.ContextVar("trace", default=None)
+_span_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("span_id", default=None)
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def record_span(name: str, start_ns: int, end_ns: int, kind: int = KIND_INTERNAL,
+                error: Optional[BaseException] = None, **attributes):
+    """Attach an already-timed span to the current request's trace (no-op outside requests)."""
+    trace = _trace_var.get()
+    if trace is None:
+        return
+    trace.spans.append({
+        "name": name,
+        "span_id": _new_span_id(),
+        "parent_id": _span_var.get(),
+        "kind": kind,
+        "start": start_ns,
+        "end": end_ns,
+        "error": repr(error) if error else None,
+        "attributes": attributes,
+    })
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """
+    Time a phase of the current request:
+
+        with span("redis.cache_get", key=key):
+            ...
+
+    Works in sync and async code; nesting follows the context var.
+    """
+    trace = _trace_var.get()
+    if trace is None:
+        yield
+        return
+
+    span_id = _new_span_id()
+    parent_id = _span_var.get()
+    token = _span_var.set(span_id)
+    start = time.time_ns()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _span_var.reset(token)
+        trace.spans.append({
+            "name": name,
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "kind": kind,
+            "start": start,
+            "end": time.time_ns(),
+            "error": repr(error) if error else None,
+            "attributes": attributes,
+        })
+
+
+def _server_timing(trace: _Trace, total_ms: float) -> str:
+    """Sum span durations per name into a Server-Timing header value."""
+    totals: dict[str, float] = {}
+    for s in trace.spans:
+        totals[s["name"]] = totals.get(s["name"], 0.0) + (s["end"] - s["start"]) / 1e6
+    parts = [f"{name};dur={ms:.2f}" for name, ms in totals.items()]
+    parts.append(f"total;dur={total_ms:.2f}")
+    return ", ".join(parts)
+
+
+async def trace_request(request: Request, call_next):
+    """
+    Open a trace for this request keyed by its X-Request-ID, run the handler,
+    then add a Server-Timing header and hand the spans to the exporter.
+    """
+    request_id = request_id_var.get() or _new_span_id()
+    trace = _Trace(trace_id=request_id.replace("-", "").ljust(32, "0")[:32])
+    trace_token = _trace_var.set(trace)
+    root_id = _new_span_id()
+    span_token = _span_var.set(root_id)
+    start = time.time_ns()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = _server_timing(trace, (time.time_ns() - start) / 1e6)
+        return response
+    finally:
+        _span_var.reset(span_token)
+        _trace_var.reset(trace_token)
+        route = request.scope.get("route")
+        trace.spans.append({
+            "name": f"{request.method} {getattr(route, 'path', request.url.path)}",
+            "span_id": root_id,
+            "parent_id": None,
+            "kind": KIND_SERVER,
+            "start": start,
+            "end": time.time_ns(),
+            "error": None if status_code < 500 else f"HTTP {status_code}",
+            "attributes": {
+                "http.method": request.method,
+                "http.target": request.url.path,
+                "http.status_code": status_code,
+                "request.id": request_id,
+            },
+        })
+        exporter.submit(trace)
+
+
+def trace_engine(engine):
+    """Emit a span for every SQL statement executed through `engine`."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_span(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_start", []).append(time.time_ns())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end_span(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["trace_start"].pop()
+        record_span("db.query", start, time.time_ns(), kind=KIND_CLIENT,
+                    **{"db.system": conn.dialect.name, "db.statement": statement[:200]})
+
+    @event.listens_for(engine, "handle_error")
+    def _drop_span(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("trace_start"):
+            conn.info["trace_start"].pop()
+
+# ---------------------------
+# OTLP/JSON exporter
+# ---------------------------
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_otlp(traces: list[_Trace]) -> dict:
+    spans = []
+    for trace in traces:
+        for s in trace.spans:
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": s["span_id"],
+                "name": s["name"],
+                "kind": s["kind"],
+                "startTimeUnixNano": str(s["start"]),
+                "endTimeUnixNano": str(s["end"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s["attributes"].items()],
+                "status": {"code": STATUS_ERROR, "message": s["error"]} if s["error"] else {"code": STATUS_OK},
+            }
+            if s["parent_id"]:
+                otlp_span["parentSpanId"] = s["parent_id"]
+            spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class TraceExporter:
+    """
+    Ships finished traces off the request path: a background thread batches
+    them and appends OTLP/JSON lines to TRACE_EXPORT_FILE and/or POSTs them
+    to an OTLP/HTTP collector (TRACE_OTLP_ENDPOINT, e.g. http://otel:4318/v1/traces).
+    """
+
+    def __init__(self):
+        self.enabled = bool(TRACE_EXPORT_FILE or TRACE_OTLP_ENDPOINT)
+        self._queue: queue.Queue = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: _Trace):
+        if not self.enabled:
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass  # drop rather than slow requests down
+
+    def stop(self, timeout: float = 5):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch, stopping = [], False
+            try:
+                item = self._queue.get(timeout=EXPORT_FLUSH_SECONDS)
+                while item is not None and len(batch) < EXPORT_BATCH_SIZE:
+                    batch.append(item)
+                    item = self._queue.get_nowait()
+                stopping = item is None
+            except queue.Empty:
+                pass
+            if batch:
+                self._export(batch)
+            if stopping:
+                return
+
+    def _export(self, batch: list[_Trace]):
+        payload = json.dumps(_to_otlp(batch))
+        try:
+            if TRACE_EXPORT_FILE:
+                with open(TRACE_EXPORT_FILE, "a", encoding="utf-8") as f:
+                    f.write(payload + "\n")
+            if TRACE_OTLP_ENDPOINT:
+                req = urllib.request.Request(
+                    TRACE_OTLP_ENDPOINT, data=payload.encode(),
+                    headers={"Content-Type": "application/json"}, method="POST",
+                )
+                urllib.request.urlopen(req, timeout=5).close()
+        except Exception as e:
+            logger.warning("Trace export failed (%d traces dropped): %s", len(batch), e)
+
+
+exporter = TraceExporter()
@@ -1,43 +1,101 @@
+import asyncio
 import logging
+import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.core.database import Base, engine, init_db
-from app.routers import auth as auth_router, transcript as transcript_router, admin
+from app.routers import auth as auth_router, transcript as transcript_router, admin, me
 from app.core.logger import logger
-from app.utils.create_admin import create_initial_admin  # Ensure this file is in your root
-from app.core.logger import logger, log_requests_middleware
+from app.core.config import AUDIT_RETENTION_INTERVAL_SECONDS, GUEST_USAGE_SYNC_INTERVAL_SECONDS, MIGRATE_ON_STARTUP
+from app.core.migrations import run_migrations
+from app.core.database import get_engine, dispose_engine
+from app.core.redis import open_redis, close_redis
+from app.core.cache_shards import close_shards
+from app.core.tasks import start_periodic, stop_background_tasks
+from app.core.rate_limit import apply_rate_limit_headers
+from app.utils.security import shutdown_password_pool
+from app.core.token_cache import start_revocation_listener, stop_revocation_listener
+from app.utils.email import outbox
+from app.core.metrics import observe_request, render_metrics, mark_worker_dead
+from app.core.profiling import profile_if_requested
+from app.core.tracing import trace_request, exporter as trace_exporter
+from app.services.retention_service import RetentionService
+from app.services.limit_service import LimitService
+from app.core.logger import logger, log_requests_middleware, stop_logging
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Application starting up...")
-    
-    # 1. Handle all Database Schema work
-    init_db() 
-    logger.info("✅ Database infrastructure ready.")
+    started = time.perf_counter()
 
-    # 2. Handle Initial Data / Business logic
-    try:
-        await create_initial_admin()
-        logger.info("👤 Admin verification complete.")
-    except Exception as e:
-        logger.error(f"❌ Admin automation failed: {e}")
+    # 1 + 2. Schema and initial data. Normally already done by the deploy's
+    #        `python -m app.utils.migrate`; then this is one SELECT under the lock.
+    if MIGRATE_ON_STARTUP:
+        try:
+            await asyncio.to_thread(run_migrations)
+        except Exception as e:
+            logger.error("❌ Migrations failed: %s", e)
+            raise
+
+    # 3. Connection pools (sized per worker in config), built here rather than at import
+    get_engine()
+    await open_redis()
+
+    # 4. Background email delivery (one persistent SMTP session)
+    outbox.start()
+
+    # 5. Keep this worker's JWT revocation set in sync via Redis pub/sub
+    start_revocation_listener()
+
+    # 6. Background maintenance (guarded by advisory locks, safe with N workers)
+    start_periodic(
+        "audit-retention",
+        AUDIT_RETENTION_INTERVAL_SECONDS,
+        lambda: asyncio.to_thread(RetentionService.compact_audits),
+    )
+    start_periodic(
+        "guest-usage-sync",
+        GUEST_USAGE_SYNC_INTERVAL_SECONDS,
+        LimitService.sync_anonymous_usage,
+    )
+    logger.info("✅ Worker ready in %.0fms", (time.perf_counter() - started) * 1000)
 
     yield 
     
     logger.info("🛑 Application shutting down...")
+    await stop_background_tasks()
+    await stop_revocation_listener()
+    shutdown_password_pool()
+    await asyncio.to_thread(outbox.stop)
+    await asyncio.to_thread(trace_exporter.stop)
+    await close_redis()
+    await close_shards()
+    dispose_engine()
+    mark_worker_dead()
+    stop_logging()
     logging.shutdown()
 
 # Initialize FastAPI with the lifespan manager
 app = FastAPI(title="FastAPI User Auth Service", lifespan=lifespan)
 
 
+def _traced(request: Request, call_next):
+    # Runs inside log_requests_middleware so the trace reuses its request ID
+    return trace_request(request, lambda req: profile_if_requested(req, call_next))
+
 # Register the Middleware
 @app.middleware("http")
 async def request_logging_context(request: Request, call_next):
-    return await log_requests_middleware(request, call_next)
+    start_time = time.perf_counter()
+    try:
+        response = await log_requests_middleware(request, lambda req: _traced(req, call_next))
+    except Exception:
+        observe_request(request, 500, time.perf_counter() - start_time)
+        raise
+    observe_request(request, response.status_code, time.perf_counter() - start_time)
+    return apply_rate_limit_headers(request, response)
 
 # CORS Configuration
 origins = [
@@ -59,8 +117,15 @@ app.add_middleware(
 # Include routes
 app.include_router(auth_router.router)
 app.include_router(transcript_router.router)
+app.include_router(me.router)
 app.include_router(admin.router) # Now protected by your admin dependency
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 @app.get("/ping")
 async def ping():
     logger.info("Ping endpoint was called.")
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, func
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from app.core.database import Base
 
 class TranscriptAudit(Base):
     __tablename__ = "transcript_audits"
+    __table_args__ = (
+        # /v1/me/history: keyset walk of one user's audits...
+        Index("ix_transcript_audits_user_created", "user_id", "created_at", "id"),
+        # ...and the "is there a newer fetch of this video" probe that deduplicates it
+        Index("ix_transcript_audits_user_video_created", "user_id", "video_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(String(50), nullable=False)
     user_id = Column(Integer, nullable=True) # Tracking which user, if logged in
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
\ No newline at end of file
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Date, UniqueConstraint
+from app.core.database import Base
+
+class TranscriptAuditRollup(Base):
+    """Per-day, per-video, per-user counts of raw audits that aged out of `transcript_audits`."""
+    __tablename__ = "transcript_audit_rollups"
+    __table_args__ = (
+        # Guests (user_id NULL) must collapse into one row per day/video (Postgres 15+)
+        UniqueConstraint("day", "video_id", "user_id", name="uq_audit_rollups_day_video_user",
+                         postgresql_nulls_not_distinct=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    video_id = Column(String(50), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    request_count = Column(Integer, nullable=False, default=0)
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, status
-from typing import List, Dict, Any
+import asyncio
+import os
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse, HTMLResponse, PlainTextResponse
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.schemas.auth import PublicUser, UserRole
 from app.core.deps import require_admin
 from app.services.admin_service import AdminService
+from app.services.export_service import ExportService, EXPORT_FORMATS
+from app.services.retention_service import RetentionService
+from app.services.activity_service import ActivityService
+from app.services.trending_service import TrendingService, MAX_WINDOW_HOURS
+from app.core import profiling
+from app.core.proxy_pool import proxy_pool
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -25,7 +35,7 @@ async def update_user_status(
     admin=Depends(require_admin)
 ):
     """Manually verify or unverify a user."""
-    return AdminService.update_user_verification(db, user_id, is_verified)
+    return await AdminService.update_user_verification(db, user_id, is_verified)
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_200_OK)
 async def delete_user(
@@ -34,7 +44,7 @@ async def delete_user(
     admin=Depends(require_admin)
 ):
     """Permanently delete a user from the system."""
-    AdminService.remove_user(db, user_id)
+    await AdminService.remove_user(db, user_id)
     return {"message": f"User {user_id} deleted successfully."}
 
 @router.get("/stats", response_model=Dict[str, Any])
@@ -47,4 +57,96 @@ async def get_dashboard_stats(
     The heart of the Admin Dashboard.
     Returns Totals, Stickiness (DAU/MAU), and Usage Trends for Chart.js.
     """
-    return AdminService.get_dashboard_stats(db, timeframe=range)
\ No newline at end of file
+    activity = await ActivityService.get_active_counts()
+    # The aggregation queries are synchronous: keep them off the event loop
+    return await asyncio.to_thread(AdminService.get_dashboard_stats, db, timeframe=range, activity=activity)
+
+@router.get("/trending", response_model=Dict[str, Any])
+async def get_trending_videos(
+    hours: int = Query(24, ge=1, le=MAX_WINDOW_HOURS, description="Window size in hours, current hour included"),
+    limit: int = Query(10, ge=1, le=100),
+    admin=Depends(require_admin)
+):
+    """Most requested videos right now, from hourly Redis sorted sets (no audit table scan)."""
+    return {"hours": hours, "videos": await TrendingService.top(hours, limit)}
+
+@router.get("/proxies", response_model=Dict[str, Any])
+async def get_proxy_health(admin=Depends(require_admin)):
+    """
+    Health of each upstream egress proxy as seen by the worker that answered
+    (scores are kept per process); totals over all workers are in /metrics
+    as upstream_proxy_fetches_total.
+    """
+    return {"worker_pid": os.getpid(), "proxies": proxy_pool.snapshot()}
+
+def _export_response(stream_fn, name: str, fmt: str, start, end, headers: Optional[dict] = None):
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if start and end and start >= end:
+        raise HTTPException(status_code=422, detail="'start' must be before 'end'.")
+
+    filename = f"{name}_{datetime.utcnow():%Y%m%d_%H%M%S}.{fmt}"
+    return StreamingResponse(
+        stream_fn(fmt, start, end),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', **(headers or {})},
+    )
+
+@router.get("/export/users")
+async def export_users(
+    format: str = Query("csv", description="csv or ndjson"),
+    start: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only users created before this time"),
+    admin=Depends(require_admin)
+):
+    """Stream all users as CSV/NDJSON straight from a server-side cursor."""
+    return _export_response(ExportService.stream_users, "users", format, start, end)
+
+@router.get("/export/audits")
+async def export_audits(
+    format: str = Query("csv", description="csv or ndjson"),
+    start: Optional[datetime] = Query(None, description="Only audits created at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only audits created before this time"),
+    admin=Depends(require_admin)
+):
+    """
+    Stream raw transcript audit history as CSV/NDJSON straight from a
+    server-side cursor. Audits created before the retention cutoff (UTC
+    midnight AUDIT_RETENTION_DAYS ago, sent as X-Audit-Retention-Cutoff) have
+    been rolled up into daily counts: export those from /admin/export/audit-rollups.
+    """
+    cutoff = RetentionService.cutoff()
+    return _export_response(ExportService.stream_audits, "audits", format, start, end,
+                            headers={"X-Audit-Retention-Cutoff": cutoff.isoformat()})
+
+@router.get("/export/audit-rollups")
+async def export_audit_rollups(
+    format: str = Query("csv", description="csv or ndjson"),
+    start: Optional[date] = Query(None, description="Only days on or after this date"),
+    end: Optional[date] = Query(None, description="Only days before this date"),
+    admin=Depends(require_admin)
+):
+    """Stream per-day, per-video, per-user request counts of audits older than the retention cutoff."""
+    return _export_response(ExportService.stream_audit_rollups, "audit_rollups", format, start, end)
+
+@router.get("/profiles", response_model=List[Dict[str, Any]])
+async def list_request_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    admin=Depends(require_admin)
+):
+    """Recently profiled requests (send `X-Profile: 1` as an admin to profile one)."""
+    return await profiling.list_reports(limit)
+
+@router.get("/profiles/{request_id}")
+async def get_request_profile(
+    request_id: str,
+    format: str = Query("html", description="html (flame view) or text"),
+    admin=Depends(require_admin)
+):
+    """Profiler report for the request with this X-Request-ID."""
+    report = await profiling.get_report(request_id, format)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired.")
+    if format == "html":
+        return HTMLResponse(report)
+    return PlainTextResponse(report)
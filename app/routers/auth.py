@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Header, status
 from sqlalchemy.orm import Session
 from app.core.database import get_db
@@ -12,44 +13,44 @@ router = APIRouter(prefix="/auth", tags=["Auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 @router.post("/signup", response_model=PublicUser)
-def signup(payload: SignUpRequest, db: Session = Depends(get_db)):
-    logger.info(f"Signup API called for email: {payload.email}")
+async def signup(payload: SignUpRequest, db: Session = Depends(get_db)):
+    logger.info("Signup API called for email: %s", payload.email)
     try:
-        user = auth_service.signup(db, payload.email, payload.password, payload.name)
-        logger.info(f"Signup successful for email: {payload.email}")
+        user = await auth_service.signup(db, payload.email, payload.password, payload.name)
+        logger.info("Signup successful for email: %s", payload.email)
         return user
     except HTTPException as e:
-        logger.warning(f"Signup failed for email: {payload.email} - {e.detail}")
+        logger.warning("Signup failed for email: %s - %s", payload.email, e.detail)
         raise
 
 @router.post("/verify-email", response_model=PublicUser)
-def verify_email(payload: VerifyEmailRequest, db: Session = Depends(get_db)):
-    logger.info(f"Verify-email API called for email: {payload.email}")
+async def verify_email(payload: VerifyEmailRequest, db: Session = Depends(get_db)):
+    logger.info("Verify-email API called for email: %s", payload.email)
     try:
-        user = auth_service.verify_email(db, payload.email, payload.code)
-        logger.info(f"Email verification successful for: {payload.email}")
+        user = await auth_service.verify_email(db, payload.email, payload.code)
+        logger.info("Email verification successful for: %s", payload.email)
         return user
     except HTTPException as e:
-        logger.warning(f"Email verification failed for email: {payload.email} - {e.detail}")
+        logger.warning("Email verification failed for email: %s - %s", payload.email, e.detail)
         raise
 
 @router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
-    logger.info(f"Login API called for email: {payload.email}")
+async def login(payload: LoginRequest, db: Session = Depends(get_db)):
+    logger.info("Login API called for email: %s", payload.email)
     try:
         # result is a dict: {"access_token": "...", "token_type": "bearer", "role": "USER"}
-        result = auth_service.login(db, payload.email, payload.password)
-        logger.info(f"Login successful for email: {payload.email}")
+        result = await auth_service.login(db, payload.email, payload.password)
+        logger.info("Login successful for email: %s", payload.email)
         
         # ✅ Return the dict; FastAPI maps the keys to your TokenResponse schema
         return result 
         
     except HTTPException as e:
-        logger.warning(f"Login failed for email: {payload.email} - {e.detail}")
+        logger.warning("Login failed for email: %s - %s", payload.email, e.detail)
         raise
 
 @router.post("/resend-verification-code")
-def resend_verification(payload: dict, db: Session = Depends(get_db)):
+async def resend_verification(payload: dict, db: Session = Depends(get_db)):
     """
     Resend the email verification code to a user.
     Body: {"email": "user@example.com"}
@@ -58,13 +59,13 @@ def resend_verification(payload: dict, db: Session = Depends(get_db)):
     if not email:
         raise HTTPException(status_code=422, detail="Email is required.")
 
-    logger.info(f"Resend-verification API called for email: {email}")
+    logger.info("Resend-verification API called for email: %s", email)
     try:
-        result = auth_service.resend_verification_email(db, email)
-        logger.info(f"Resend-verification successful for email: {email}")
+        result = await auth_service.resend_verification_email(db, email)
+        logger.info("Resend-verification successful for email: %s", email)
         return result
     except HTTPException as e:
-        logger.warning(f"Resend-verification failed for email: {email} - {e.detail}")
+        logger.warning("Resend-verification failed for email: %s - %s", email, e.detail)
         raise
 
 @router.post("/logout", summary="Logout / Revoke JWT")
@@ -88,7 +89,7 @@ def refresh_token(refresh_token: str = Depends(oauth2_scheme)):
     
 @router.post("/send-forgot-password-code")
 async def forgot_password(payload: ForgotPasswordRequest, db: Session = Depends(get_db)):
-    user = auth_service.get_user_by_email(db, payload.email)  # DB lookup
+    user = await asyncio.to_thread(auth_service.find_user, db, payload.email)  # DB lookup
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return await auth_service.send_reset_password_email(user)
@@ -105,5 +106,5 @@ async def get_current_user_profile(
     """
     Return the logged-in user's profile using JWT sub claim.
     """
-    user_data = auth_service.get_user_profile(db, current_user["sub"])
+    user_data = await auth_service.get_user_profile(db, current_user["sub"])
     return PublicUser.validate(user_data)  # Ensure it matches schema
\ No newline at end of file
@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.deps import get_current_user
+from app.core.rate_limit import RateLimiter
+from app.schemas.history import HistoryPage
+from app.services.history_service import HistoryService
+
+router = APIRouter(prefix="/v1/me", tags=["me"])
+
+@router.get(
+    "/history",
+    response_model=HistoryPage,
+    summary="Get the current user's transcript history",
+    dependencies=[Depends(RateLimiter("history"))],
+)
+async def get_my_history(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    include_cached: bool = Query(False, description="Also report whether each transcript is cached"),
+    current_user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Videos the user fetched, most recent first, each listed once. History
+    covers the audit retention window (AUDIT_RETENTION_DAYS). Counts
+    against the caller's RATE_LIMITS quota in its own "history" bucket.
+    """
+    return await HistoryService.get_history(db, int(current_user["sub"]), limit, cursor, include_cached)
@@ -1,50 +1,89 @@
 from typing import Optional
-from fastapi import APIRouter, Query, Depends, status, Request
+from fastapi import APIRouter, Query, Depends, status, Request, Response
 from fastapi.responses import JSONResponse  # ✅ Required for professional error handling
 from sqlalchemy.orm import Session
 
-from app.services.transcript_service import get_transcript
-from app.services.limit_service import LimitService
+from app.services.transcript_service import get_transcript, get_transcript_range
+from app.services.admission_service import AdmissionService
+from app.services.cache_service import EncodedBody, accepted_encodings
+from app.services.trending_service import TrendingService
 from app.core.database import get_db
 from app.core.exceptions import TranscriptError
 from app.schemas.transcript import SuccessResponse, ErrorResponse
 from app.core.logger import logger
-from app.core.deps import get_optional_user
+from app.core.deps import get_optional_token
+from app.core.rate_limit import rate_limit_exceeded
+from app.core.metrics import GUEST_LIMIT_REJECTIONS
 
 router = APIRouter(prefix="/v1/transcripts", tags=["transcripts"])
 
+def _success_response(transcript: EncodedBody) -> Response:
+    # Skips SuccessResponse validation, re-encoding and compression: the cached
+    # bytes are the whole response body, already in the negotiated encoding
+    headers = {"Vary": "Accept-Encoding"}
+    if transcript.encoding != "identity":
+        headers["Content-Encoding"] = transcript.encoding
+    return Response(content=transcript.body, media_type="application/json", headers=headers)
+
 @router.get(
     "",
     response_model=SuccessResponse,
     responses={
         200: {"model": SuccessResponse, "description": "Transcript fetched successfully"},
+        400: {"model": ErrorResponse, "description": "Invalid time range"},
         403: {"model": ErrorResponse, "description": "Daily limit reached or private video"},
         404: {"model": ErrorResponse, "description": "Video/Transcript unavailable"},
+        429: {"description": "Per-user rate limit exceeded (see Retry-After)"},
         500: {"model": ErrorResponse, "description": "Internal server error"},
     },
     summary="Fetch transcript of a YouTube video",
-    description="Returns cleaned transcript with guest rate limiting."
+    description=(
+        "Returns cleaned transcript with guest and per-user rate limiting. With `start`/`end` "
+        "and/or `offset`/`limit` only that part of the transcript is returned, with its snippets."
+    ),
 )
 async def fetch_transcript(
     request: Request,
     video_id: str = Query(..., description="YouTube video ID"),
     language: Optional[str] = Query(None, description="Optional language code"),
+    start: Optional[float] = Query(None, ge=0, description="Only snippets still running at or after this second"),
+    end: Optional[float] = Query(None, gt=0, description="Only snippets starting before this second"),
+    offset: Optional[int] = Query(None, ge=0, description="Snippets to skip within the time range"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum snippets to return"),
     db: Session = Depends(get_db),
-    current_user: Optional[dict] = Depends(get_optional_user)
+    token: Optional[dict] = Depends(get_optional_token)
 ):
+    if start is not None and end is not None and end <= start:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": "error", "code": 400, "message": "`end` must be greater than `start`"},
+        )
+    is_range = any(param is not None for param in (start, end, offset, limit))
+
+    # Range requests are served from the chunked index, so the full body is not read
+    encodings = [] if is_range else accepted_encodings(request.headers.get("accept-encoding"))
+    # Revocation, activity, quota and the cache read: one Redis round trip
+    admission = await AdmissionService.admit_transcript_request(
+        "transcripts", token, request.client.host, video_id, language or "default", encodings
+    )
+    current_user = admission.user
     user_id = None
     
     if current_user:
-        # Authenticated User Flow
+        # Authenticated User Flow (per-user token bucket)
         user_id = int(current_user['sub'])
-        logger.info(f"Auth User {user_id} requested video_id={video_id}")
+        logger.info("Auth User %s requested video_id=%s", user_id, video_id)
+        # Picked up by apply_rate_limit_headers, since we may return a JSONResponse
+        request.state.rate_limit_headers = admission.rate_limit_headers
+        if not admission.allowed:
+            raise rate_limit_exceeded("transcripts", admission.rate_limit_headers, admission.retry_after)
     else:
         # Anonymous Guest Flow (IP Rate Limited)
-        client_ip = request.client.host
-        logger.info(f"Guest IP {client_ip} requested video_id={video_id}")
-        
-        # Check if this IP has used up its 5 daily requests
-        if not LimitService.check_anonymous_limit(db, client_ip):
+        logger.info("Guest IP %s requested video_id=%s", request.client.host, video_id)
+
+        # Rejected when this IP has used up its daily requests
+        if not admission.allowed:
+            GUEST_LIMIT_REJECTIONS.inc()
             # ✅ PROFESSIONAL FIX: Return JSONResponse to bypass SuccessResponse validation
             return JSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -56,16 +95,35 @@ async def fetch_transcript(
             )
 
     try:
+        if is_range:
+            body = await get_transcript_range(
+                db=db,
+                video_id=video_id,
+                user_id=user_id,
+                language=language,
+                start=start,
+                end=end,
+                offset=offset or 0,
+                limit=limit,
+            )
+            response = Response(content=body, media_type="application/json")
+            await TrendingService.record(video_id)
+            return response
+
         # Pass user_id (it will be None for guests)
         transcript = await get_transcript(
             db=db, 
             video_id=video_id, 
             user_id=user_id, 
-            language=language
+            language=language,
+            encodings=encodings,
+            cached=admission.cached,
         )
-        
-        # This returns as SuccessResponse correctly
-        return SuccessResponse(status="success", code=200, data=transcript)
+        # Same shape as SuccessResponse, without decoding the transcript
+        response = _success_response(transcript)
+        if admission.cached is None:
+            await TrendingService.record(video_id)  # hits were counted during admission
+        return response
 
     except TranscriptError as e:
         # ✅ ALSO FIX HERE: Use JSONResponse for caught service exceptions
@@ -79,7 +137,7 @@ async def fetch_transcript(
         )
     except Exception as e:
         # Final safety net for 500 errors
-        logger.error(f"Unhandled error: {str(e)}")
+        logger.error("Unhandled error: %s", e)
         return JSONResponse(
             status_code=500,
             content={
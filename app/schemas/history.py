@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+class HistoryEntry(BaseModel):
+    video_id: str
+    last_fetched_at: datetime
+    # Only filled with include_cached=true: is the default-language transcript in Redis?
+    cached: Optional[bool] = None
+
+class HistoryPage(BaseModel):
+    items: List[HistoryEntry]
+    # Pass back as `cursor` for the next page; None on the last page
+    next_cursor: Optional[str] = None
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from app.core.config import (
+    WEB_CONCURRENCY, HOST, PORT, GRACEFUL_SHUTDOWN_TIMEOUT, KEEP_ALIVE_TIMEOUT, MIGRATE_ON_STARTUP,
+)
+
+
+def _prepare_metrics_dir(workers: int):
+    """Workers share one prometheus_client multiprocess directory, emptied on every start."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+    elif workers > 1:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="transcripto-metrics-")
+
+
+def _migrate_once():
+    """Migrate in the supervisor so the N workers start without touching the schema."""
+    from app.core.database import dispose_engine
+    from app.core.migrations import run_migrations
+
+    run_migrations()
+    dispose_engine()  # workers build their own pools
+    os.environ["MIGRATE_ON_STARTUP"] = "false"
+
+
+# Production entry point:  python -m app.server
+# Prefork WEB_CONCURRENCY workers (default: one per CPU). On SIGTERM/SIGINT
+# uvicorn stops accepting connections, lets in-flight requests finish for up
+# to GRACEFUL_SHUTDOWN_TIMEOUT and runs each worker's lifespan shutdown,
+# which drains the outbox and closes the Redis and database pools.
+if __name__ == "__main__":
+    _prepare_metrics_dir(WEB_CONCURRENCY)
+    if MIGRATE_ON_STARTUP:
+        _migrate_once()
+
+    uvicorn.run(
+        "app.main:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_TIMEOUT,
+        timeout_keep_alive=KEEP_ALIVE_TIMEOUT,
+        # Every request is already logged by log_requests_middleware
+        access_log=False,
+    )
@@ -1,11 +1,13 @@
-from http.client import HTTPException
+from fastapi import HTTPException
 
 from app.services.limit_service import LimitService
+from app.services.cache_service import CacheService
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, cast, literal, select, union_all, DateTime
 from datetime import datetime, timedelta
 from app.models.user import User, UserRole
 from app.models.audit import TranscriptAudit # The new model
+from app.models.audit_rollup import TranscriptAuditRollup
 
 class AdminService:
     @staticmethod
@@ -15,7 +17,7 @@ class AdminService:
         return db.query(User).filter(User.role == role).all()
 
     @staticmethod
-    def update_user_verification(db: Session, user_id: int, is_verified: bool):
+    async def update_user_verification(db: Session, user_id: int, is_verified: bool):
         user = db.query(User).filter(User.id == user_id, User.role == UserRole.USER).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -23,16 +25,18 @@ class AdminService:
         user.is_verified = is_verified
         db.commit()
         db.refresh(user)
+        await CacheService.invalidate_user_profile(user_id)
         return user
 
     @staticmethod
-    def remove_user(db: Session, user_id: int):
+    async def remove_user(db: Session, user_id: int):
         user = db.query(User).filter(User.id == user_id, User.role == UserRole.USER).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
         db.delete(user)
         db.commit()
+        await CacheService.invalidate_user_profile(user_id)
         return True
 
     @staticmethod
@@ -49,7 +53,11 @@ class AdminService:
         }
         
     @staticmethod
-    def get_dashboard_stats(db: Session, timeframe: str = "monthly"):
+    def get_dashboard_stats(db: Session, activity: dict, timeframe: str = "monthly"):
+        """
+        `activity` holds the HyperLogLog DAU/WAU/MAU counts from
+        ActivityService.get_active_counts() (real transcript usage, not logins).
+        """
         now = datetime.utcnow()
         
         # Mapping timeframe to PostgreSQL intervals
@@ -65,20 +73,35 @@ class AdminService:
 
         # 1. Basic Totals (Always total)
         total_users = db.query(User).filter(User.role == UserRole.USER).count()
-        total_transcripts = db.query(TranscriptAudit).count()
+        # Raw audits only cover the retention window; older ones live in the rollups
+        rolled_up_total = db.query(func.coalesce(func.sum(TranscriptAuditRollup.request_count), 0)).scalar()
+        total_transcripts = db.query(TranscriptAudit).count() + rolled_up_total
 
         # 2. Stickiness (DAU/MAU) - This remains a static high-level KPI
-        dau = db.query(User).filter(User.last_login >= now - timedelta(days=1)).count()
-        mau = db.query(User).filter(User.last_login >= now - timedelta(days=30)).count()
+        dau = activity["users"]["dau"]
+        mau = activity["users"]["mau"]
         stickiness = round((dau / mau * 100), 2) if mau > 0 else 0
 
         # 3. Dynamic Trend Query
         # Uses DATE_TRUNC to group by hour, day, or month based on selection
+        # Raw rows and day-level rollups are combined so long ranges stay complete
+        usage = union_all(
+            select(
+                TranscriptAudit.created_at.label('ts'),
+                TranscriptAudit.user_id,
+                literal(1).label('hits')
+            ).filter(TranscriptAudit.created_at >= start_date),
+            select(
+                cast(TranscriptAuditRollup.day, DateTime(timezone=True)).label('ts'),
+                TranscriptAuditRollup.user_id,
+                TranscriptAuditRollup.request_count.label('hits')
+            ).filter(TranscriptAuditRollup.day >= start_date.date())
+        ).subquery()
+
         trend_data = db.query(
-            func.date_trunc(trunc_unit, TranscriptAudit.created_at).label('period'),
-            (func.count(TranscriptAudit.id) / func.nullif(func.count(TranscriptAudit.user_id.distinct()), 0)).label('avg_usage')
-        ).filter(TranscriptAudit.created_at >= start_date)\
-         .group_by('period')\
+            func.date_trunc(trunc_unit, usage.c.ts).label('period'),
+            (func.sum(usage.c.hits) / func.nullif(func.count(usage.c.user_id.distinct()), 0)).label('avg_usage')
+        ).group_by('period')\
          .order_by('period')\
          .all()
          
@@ -89,6 +112,8 @@ class AdminService:
         
         # Count how many total transcripts were fetched specifically by Guests (user_id is NULL)
         guest_transcripts = db.query(TranscriptAudit).filter(TranscriptAudit.user_id.is_(None)).count()
+        guest_transcripts += db.query(func.coalesce(func.sum(TranscriptAuditRollup.request_count), 0))\
+            .filter(TranscriptAuditRollup.user_id.is_(None)).scalar()
         # --- END OF PLUGGED DATA ---
 
         return {
@@ -96,12 +121,14 @@ class AdminService:
             "users": total_users,
             "transcripts": total_transcripts,
             "sessions": dau,
-            "anonymous_users": anon_stats["total_anonymous"],
+            "anonymous_users": activity["guests"]["mau"],
             "power_guests": anon_stats["power_guests"],
             "guest_transcripts": guest_transcripts
         },
         "engagement": {
             "stickiness": stickiness,
+            "activeUsers": activity["users"],
+            "activeGuests": activity["guests"],
             "usageTrend": {
                 # Ensure row.period is not None before calling strftime
                 "labels": [row.period.strftime("%b %d" if timeframe != "yearly" else "%b %Y") for row in trend_data if row.period] or ["No Data"],
@@ -0,0 +1,169 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from app.core import cache_shards
+from app.core.config import GUEST_DAILY_LIMIT
+from app.core.rate_limit import TOKEN_BUCKET_LUA, limits_for, quota_headers
+from app.core.redis import rb
+from app.core.token_cache import is_revoked_locally, revocation_key
+from app.core.tracing import span
+from app.services.activity_service import ActivityService, SKETCH_RETENTION
+from app.services.cache_service import CacheService, EncodedBody, FIRST_VARIANT_LUA
+from app.services.limit_service import GUEST_LIMIT_LUA, LimitService
+from app.services.trending_service import BUCKET_RETENTION, TrendingService
+
+# Everything a transcript request needs from Redis before doing real work, in
+# one round trip: revocation check, activity sketch, quota and the cache read
+# (plus the trending count when that read is a hit: a cached video is a real
+# one, so garbage ids never reach the ranking).
+# KEYS[1] = quota key (user token bucket or guest counter), KEYS[2] = guest dirty set,
+# KEYS[3] = revocation key, KEYS[4] = today's HLL sketch, KEYS[5] = transcript cache key,
+# KEYS[6] = this hour's trending sorted set
+# ARGV[1] = 'user' | 'guest', ARGV[2] = '1' to check revocation, ARGV[3] = sketch member,
+# ARGV[4] = sketch TTL, ARGV[5..7] = capacity, refill rate, cost (user) or limit, window end, ip (guest),
+# ARGV[8] = video id, ARGV[9] = trending bucket TTL, ARGV[10..] = acceptable content encodings, best first
+# Returns {'revoked'} | {'rejected', tokens, retry_after, reset}
+#       | {'ok', tokens, retry_after, reset, encoding, body}
+# (encoding and body are '' on a cache miss; the quota fields are '' for guests). Runs
+# on the binary client so the body reaches the response as raw bytes. With
+# REDIS_CACHE_NODES set the transcript lives on a shard instead: the script gets
+# no encodings (KEYS[5] is then never read) and the cache is read separately.
+ADMISSION_SCRIPT = TOKEN_BUCKET_LUA + GUEST_LIMIT_LUA + FIRST_VARIANT_LUA + """
+if ARGV[2] == '1' and redis.call('EXISTS', KEYS[3]) == 1 then
+    return {'revoked'}
+end
+
+redis.call('PFADD', KEYS[4], ARGV[3])
+redis.call('EXPIRE', KEYS[4], ARGV[4])
+
+local quota = {1, '', '', ''}
+if ARGV[1] == 'user' then
+    quota = token_bucket(KEYS[1], tonumber(ARGV[5]), tonumber(ARGV[6]), tonumber(ARGV[7]))
+    if quota[1] == 0 then
+        return {'rejected', quota[2], quota[3], quota[4]}
+    end
+elseif guest_limit(KEYS[1], KEYS[2], tonumber(ARGV[5]), tonumber(ARGV[6]), ARGV[7]) == -1 then
+    return {'rejected', '', '', ''}
+end
+
+local variant = first_variant(KEYS[5], {unpack(ARGV, 10)})
+if not variant then
+    return {'ok', quota[2], quota[3], quota[4], '', ''}
+end
+redis.call('ZINCRBY', KEYS[6], 1, ARGV[8])
+redis.call('EXPIRE', KEYS[6], ARGV[9])
+return {'ok', quota[2], quota[3], quota[4], variant[1], variant[2]}
+"""
+
+_admission = rb.register_script(ADMISSION_SCRIPT)
+
+
+@dataclass
+class Admission:
+    """Outcome of the hot-path Redis call for one transcript request."""
+
+    user: Optional[dict]  # None for guests, including revoked tokens
+    allowed: bool
+    # Negotiated response body, straight from Redis; a hit is already counted in trending
+    cached: Optional[EncodedBody] = None
+    # Quota state for authenticated users (X-RateLimit-* headers)
+    rate_limit_headers: dict = field(default_factory=dict)
+    retry_after: float = 0.0
+
+
+class AdmissionService:
+    @staticmethod
+    async def admit_transcript_request(
+        scope: str, user: Optional[dict], ip: Optional[str], video_id: str, language: str,
+        encodings: list[str], cost: int = 1
+    ) -> Admission:
+        """
+        Admit (or reject) a transcript request and read its cache entry (the
+        best variant among `encodings`) in a single Redis call. `user` is the
+        decoded token, not yet checked for revocation; a revoked token is
+        re-admitted as a guest, as optional-auth routes treat it everywhere.
+
+        When the cache is sharded, admission still runs on the primary and
+        the read goes to the key's shard at the same time, so a hit still
+        costs one round trip of latency.
+        """
+        if not encodings or cache_shards.ring is None:
+            return await AdmissionService._admit(scope, user, ip, video_id, language, encodings, cost)
+
+        admission, cached = await asyncio.gather(
+            AdmissionService._admit(scope, user, ip, video_id, language, [], cost),
+            CacheService.get_transcript(video_id, language, encodings),
+        )
+        if admission.allowed and cached is not None:
+            admission.cached = cached
+            # The script only counts hits it read itself
+            await TrendingService.record(video_id)
+        return admission
+
+    @staticmethod
+    async def _admit(scope, user, ip, video_id, language, encodings, cost) -> Admission:
+        if user is not None:
+            revoked = is_revoked_locally(user)
+            if revoked:
+                user = None
+            else:
+                admission = await AdmissionService._run_user(scope, user, video_id, language, encodings,
+                                                             cost, check_revocation=revoked is None)
+                if admission is not None:
+                    return admission
+                user = None  # revoked according to Redis
+        return await AdmissionService._run_guest(ip, video_id, language, encodings)
+
+    @staticmethod
+    async def _run_user(scope, user, video_id, language, encodings, cost, check_revocation) -> Optional[Admission]:
+        capacity, period = limits_for(user)
+        sketch_key, member = ActivityService.sketch_for(int(user["sub"]), None)
+        with span("redis.admission", mode="user"):
+            result = await _admission(
+                keys=[
+                    f"ratelimit:{scope}:{user['sub']}",
+                    f"ratelimit:{scope}:{user['sub']}",  # no dirty set for users
+                    revocation_key(user),
+                    sketch_key,
+                    CacheService._build_key(video_id, language),
+                    TrendingService.current_bucket(),
+                ],
+                args=["user", "1" if check_revocation else "0", member, SKETCH_RETENTION,
+                      capacity, capacity / period, cost, video_id, BUCKET_RETENTION, *encodings],
+            )
+        if result[0] == b"revoked":
+            return None
+
+        status, tokens, retry_after, reset = result[:4]
+        headers = quota_headers(capacity, tokens, reset)
+        if status == b"rejected":
+            return Admission(user=user, allowed=False, rate_limit_headers=headers,
+                             retry_after=float(retry_after))
+        return Admission(user=user, allowed=True, rate_limit_headers=headers, cached=AdmissionService._cached(result))
+
+    @staticmethod
+    async def _run_guest(ip, video_id, language, encodings) -> Admission:
+        window_id, window_end = LimitService._window()
+        sketch_key, member = ActivityService.sketch_for(None, ip)
+        with span("redis.admission", mode="guest"):
+            result = await _admission(
+                keys=[
+                    LimitService._counter_key(window_id, ip),
+                    LimitService._dirty_key(window_id),
+                    "revoked:none",  # unused for guests
+                    sketch_key,
+                    CacheService._build_key(video_id, language),
+                    TrendingService.current_bucket(),
+                ],
+                args=["guest", "0", member, SKETCH_RETENTION, GUEST_DAILY_LIMIT, window_end, ip,
+                      video_id, BUCKET_RETENTION, *encodings],
+            )
+        if result[0] == b"rejected":
+            return Admission(user=None, allowed=False)
+        return Admission(user=None, allowed=True, cached=AdmissionService._cached(result))
+
+    @staticmethod
+    def _cached(result: list) -> Optional[EncodedBody]:
+        encoding, body = result[4], result[5]
+        return EncodedBody(encoding.decode(), body) if encoding else None
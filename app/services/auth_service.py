@@ -1,29 +1,47 @@
+import asyncio
 import random
 import string
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 from app.models.user import User
-from app.models.email_verification import EmailVerification
-from app.utils.security import hash_password, verify_password, create_access_token, refresh_access_token as security_refresh_token
+from app.utils.security import hash_password_async, verify_password_async, create_access_token, refresh_access_token as security_refresh_token
 from app.utils.email import send_email, validate_and_normalize_email, generate_verification_email_template
 from app.core.logger import logger
-from sqlalchemy.exc import SQLAlchemyError
 from app.core.redis import r
+from app.core.token_cache import revoke_token
+from app.services.cache_service import CacheService
+from app.services.verification_store import VerificationStore
 from sqlalchemy import func
 
 CODE_TTL_MINUTES = 15
 MAX_ATTEMPTS = 5
 
-def _new_code() -> str:
-    return f"{random.randint(0, 999999):06d}"
-
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email.lower().strip()).first()
 
-def signup(db: Session, email: str, password: str, name: str):
-    logger.info(f"Attempting signup for email: {email}")
+# The coroutines below run their database work through asyncio.to_thread and
+# end the transaction before awaiting bcrypt or Redis: a session that holds its
+# pooled connection across those waits starves the pool under load, and a
+# blocking pool checkout on the event loop then stalls every request.
+
+def _detach(db: Session, user):
+    """End the transaction and hand back `user` with its loaded attributes, no longer tied to `db`."""
+    if user is not None:
+        db.expunge(user)
+    db.rollback()
+    return user
+
+def find_user(db: Session, email: str):
+    return _detach(db, get_user_by_email(db, email))
+
+def _update_user(db: Session, user_id: int, **values):
+    db.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
+    db.commit()
+
+async def signup(db: Session, email: str, password: str, name: str):
+    logger.info("Attempting signup for email: %s", email)
 
     # ✅ Validate + normalize email first
     email = validate_and_normalize_email(email)
@@ -31,119 +49,100 @@ def signup(db: Session, email: str, password: str, name: str):
     user = User(
         name=name,
         email=email,  # already normalized in validate_email_address
-        password_hash=hash_password(password),
+        password_hash=await hash_password_async(password),
         is_verified=False
     )
+    user = await asyncio.to_thread(_create_user, db, user)
+
+    # Generate and send new verification code (replaces any older one)
+    code = await VerificationStore.issue(user.id, CODE_TTL_MINUTES * 60)
+    logger.info("Verification code generated for user: %s", email)
 
+    subject, html, text_body = generate_verification_email_template(user.email, code)
+    send_email(user.email, subject, html, text_body=text_body)
+
+    logger.info("Verification email queued for: %s", email)
+
+    return user
+
+def _create_user(db: Session, user: User) -> User:
+    email = user.email
     try:
         db.add(user)
         db.flush()
-        logger.info(f"New user created: {email}")
+        logger.info("New user created: %s", email)
     except IntegrityError:
         db.rollback()
         existing = get_user_by_email(db, email)
         if existing and existing.is_verified:
-            logger.warning(f"Signup attempt for already registered email: {email}")
+            logger.warning("Signup attempt for already registered email: %s", email)
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered.")
         user = existing or None
         if not user:
-            logger.error(f"Failed to create user for email: {email}")
+            logger.error("Failed to create user for email: %s", email)
             raise HTTPException(status_code=400, detail="Failed to create user.")
 
-    # Consume old codes
-    db.query(EmailVerification).filter(
-        EmailVerification.user_id == user.id,
-        EmailVerification.consumed == False
-    ).update({"consumed": True})
-    logger.info(f"Old verification codes consumed for user: {email}")
-
-    # Generate and send new verification code
-    code = _new_code()
-    expires_at = datetime.now(timezone.utc) + timedelta(minutes=CODE_TTL_MINUTES)
-    ev = EmailVerification(user_id=user.id, code=code, expires_at=expires_at)
-    db.add(ev)
     db.commit()
-    logger.info(f"Verification code generated for user: {email}")
+    db.refresh(user)
+    return _detach(db, user)
 
-    subject, html, text_body = generate_verification_email_template(user.email, code)
-    send_email(user.email, subject, html, text_body=text_body)
-
-    logger.info(f"Verification email sent to: {email}")
-
-    return user
-
-def verify_email(db: Session, email: str, code: str):
-    logger.info(f"Attempting to verify email: {email} with code: {code}")
+async def verify_email(db: Session, email: str, code: str):
+    logger.info("Attempting to verify email: %s", email)
     
     # ✅ Validate + normalize email first
     validate_and_normalize_email(email)
 
-    user = get_user_by_email(db, email)
+    user = await asyncio.to_thread(find_user, db, email)
     if not user:
-        logger.warning(f"Verification failed: user not found: {email}")
+        logger.warning("Verification failed: user not found: %s", email)
         raise HTTPException(status_code=404, detail="User not found.")
 
-    ev = db.query(EmailVerification).filter(
-        EmailVerification.user_id == user.id,
-        EmailVerification.consumed == False
-    ).order_by(EmailVerification.id.desc()).first()
+    # Attempt counting, expiry and consumption happen atomically in Redis
+    result = await VerificationStore.verify(user.id, code, MAX_ATTEMPTS)
 
-    if not ev:
-        logger.warning(f"No active verification code for user: {email}")
-        raise HTTPException(status_code=400, detail="No active code. Signup again.")
+    if result == "missing":
+        logger.warning("No active verification code for user: %s", email)
+        raise HTTPException(status_code=400, detail="No active code or code expired. Request a new one.")
 
-    if ev.attempts >= MAX_ATTEMPTS:
-        ev.consumed = True
-        db.commit()
-        logger.warning(f"Too many attempts for user: {email}")
+    if result == "too_many":
+        logger.warning("Too many attempts for user: %s", email)
         raise HTTPException(status_code=429, detail="Too many attempts.")
 
-    ev.attempts += 1
-    now = datetime.now(timezone.utc)
-    if now > ev.expires_at:
-        ev.consumed = True
-        db.commit()
-        logger.warning(f"Verification code expired for user: {email}")
-        raise HTTPException(status_code=400, detail="Code expired.")
-
-    if code != ev.code:
-        db.commit()
-        logger.warning(f"Invalid verification code attempt for user: {email}")
+    if result == "invalid":
+        logger.warning("Invalid verification code attempt for user: %s", email)
         raise HTTPException(status_code=400, detail="Invalid code.")
 
-    ev.consumed = True
+    await asyncio.to_thread(_update_user, db, user.id, is_verified=True)
     user.is_verified = True
-    db.commit()
-    logger.info(f"Email verified successfully for user: {email}")
+    await CacheService.invalidate_user_profile(user.id)
+    logger.info("Email verified successfully for user: %s", email)
     return user
 
-def login(db: Session, email: str, password: str) -> str:
-    logger.info(f"Login attempt for email: {email}")
+async def login(db: Session, email: str, password: str) -> dict:
+    logger.info("Login attempt for email: %s", email)
     
     # 1. Validate + normalize email
     validate_and_normalize_email(email)
 
-    # 2. Fetch User
-    user = get_user_by_email(db, email)
+    # 2. Fetch User (the connection is back in the pool before bcrypt runs)
+    user = await asyncio.to_thread(find_user, db, email)
     
     # 3. Security Checks
-    if not user or not verify_password(password, user.password_hash):
-        logger.warning(f"Invalid credentials for email: {email}")
+    if not user or not await verify_password_async(password, user.password_hash):
+        logger.warning("Invalid credentials for email: %s", email)
         raise HTTPException(status_code=401, detail="Invalid credentials.")
         
     if not user.is_verified:
-        logger.warning(f"Login attempt with unverified email: {email}")
+        logger.warning("Login attempt with unverified email: %s", email)
         raise HTTPException(status_code=403, detail="Email not verified.")
 
     # 4. UPDATE LAST LOGIN (Crucial for Admin Analytics)
     try:
-        user.last_login = func.now()
-        db.commit()
-        db.refresh(user)
-        logger.info(f"Updated last_login for user: {user.id}")
+        await asyncio.to_thread(_update_user, db, user.id, last_login=func.now())
+        logger.info("Updated last_login for user: %s", user.id)
     except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to update last_login for user {user.id}: {e}")
+        await asyncio.to_thread(db.rollback)
+        logger.error("Failed to update last_login for user %s: %s", user.id, e)
         # We don't raise an error here because the user successfully 
         # authenticated; we don't want to block their login if 
         # just the timestamp update fails.
@@ -151,7 +150,7 @@ def login(db: Session, email: str, password: str) -> str:
     # 5. Generate Token
     token = create_access_token(sub=str(user.id), role=user.role)
     
-    logger.info(f"Login successful for user: {email} | Role: {user.role}")
+    logger.info("Login successful for user: %s | Role: %s", email, user.role)
     
     # Return both so the frontend can react immediately
     return {
@@ -161,46 +160,30 @@ def login(db: Session, email: str, password: str) -> str:
         "role": user.role # <--- Add this,
     }
     
-def resend_verification_email(db: Session, email: str):
+async def resend_verification_email(db: Session, email: str):
 
-    logger.info(f"Resend verification email requested for: {email}")
+    logger.info("Resend verification email requested for: %s", email)
 
     # Validate and normalize email
     email = validate_and_normalize_email(email)
     
-    user = get_user_by_email(db, email)
+    user = await asyncio.to_thread(find_user, db, email)
     if not user:
-        logger.warning(f"Resend failed: user not found: {email}")
+        logger.warning("Resend failed: user not found: %s", email)
         raise HTTPException(status_code=404, detail="User not found.")
 
     if user.is_verified:
-        logger.info(f"Resend skipped: user already verified: {email}")
+        logger.info("Resend skipped: user already verified: %s", email)
         raise HTTPException(status_code=400, detail="Email already verified.")
 
-    # Invalidate old codes
-    db.query(EmailVerification).filter(
-        EmailVerification.user_id == user.id,
-        EmailVerification.consumed == False
-    ).update({"consumed": True})
-    logger.info(f"Old verification codes consumed for user: {email}")
-
-    # Generate new code
-    code = _new_code()
-    expires_at = datetime.now(timezone.utc) + timedelta(minutes=CODE_TTL_MINUTES)
-    ev = EmailVerification(user_id=user.id, code=code, expires_at=expires_at)
-    db.add(ev)
-    try:
-        db.commit()
-        logger.info(f"New verification code generated for user: {email}")
-    except SQLAlchemyError as e:
-        db.rollback()
-        logger.error(f"Failed to save new verification code for {email}: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error.")
+    # Generate new code (replaces the old one)
+    code = await VerificationStore.issue(user.id, CODE_TTL_MINUTES * 60)
+    logger.info("New verification code generated for user: %s", email)
 
     # Send email
     subject, html, text_body = generate_verification_email_template(user.email, code)
     send_email(user.email, subject, html, text_body=text_body)
-    logger.info(f"Verification email sent to: {email}")
+    logger.info("Verification email queued for: %s", email)
 
     return {"message": "Verification email resent successfully."}
 
@@ -208,8 +191,6 @@ async def logout(current_user: dict):
     """
     Business logic to revoke the current JWT.
     """
-    token_key = f"revoked:{current_user['sub']}:{current_user['iat']}"
-    
     # Calculate remaining lifetime
     exp = datetime.fromtimestamp(current_user["exp"], tz=timezone.utc)
     now = datetime.now(timezone.utc)
@@ -218,8 +199,8 @@ async def logout(current_user: dict):
     if ttl <= 0:
         raise HTTPException(status_code=400, detail="Token already expired")
     
-    # Store in Redis with TTL
-    await r.set(token_key, "revoked", ex=int(ttl))
+    # Store in Redis with TTL and notify every worker's local revocation set
+    await revoke_token(current_user, int(ttl))
     
     return {"message": "Successfully logged out"}
 
@@ -289,27 +270,42 @@ async def reset_password(db:Session, email: str, code: str, new_password: str):
         )
 
     # Update password in DB
-    user = get_user_by_email(db, email)
-    user.password_hash = hash_password(new_password)
-    db.commit()
+    user = await asyncio.to_thread(find_user, db, email)
+    password_hash = await hash_password_async(new_password)
+    await asyncio.to_thread(_update_user, db, user.id, password_hash=password_hash)
+    await CacheService.invalidate_user_profile(user.id)
     await r.delete(key)  # Invalidate reset code
     return {"message": "Password updated successfully."}
 
 
-def get_user_profile(db: Session, user_sub: str) -> dict:
+async def get_user_profile(db: Session, user_sub: str) -> dict:
     """
-    Fetch full user info from the database by JWT 'sub' claim.
+    Fetch full user info by JWT 'sub' claim, read-through the Redis profile cache.
     """
-    user = db.query(User).filter(User.id == user_sub).first()
-    if not user:
+    cached, generation = await CacheService.get_user_profile(user_sub)
+    if cached:
+        return cached
+
+    profile = await asyncio.to_thread(_load_profile, db, user_sub)
+    if profile is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    # Skipped if a write invalidated the profile while we were reading it
+    await CacheService.set_user_profile(user_sub, profile, generation)
+    return profile
+
+def _load_profile(db: Session, user_sub: str) -> dict | None:
+    user = _detach(db, db.query(User).filter(User.id == user_sub).first())
+    if not user:
+        return None
     return {
         "id": str(user.id),  # convert int to string,
         "email": user.email,
         "name": user.name,
-        "is_verified": user.is_verified
+        "is_verified": user.is_verified,
+        "role": user.role.value,
+        "created_at": user.created_at.isoformat() if user.created_at else None
     }
@@ -1,24 +1,274 @@
+import asyncio
+import gzip
+import itertools
 import json
+from array import array
 from datetime import timedelta
-from app.core.redis import r
+from typing import NamedTuple
+
+import orjson
+
+from app.core import cache_shards
+from app.core.redis import r, rb
+from app.core.tracing import span
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip and identity variants are stored
+    brotli = None
 
 CACHE_EXPIRY = 60 * 60 * 24  # 24 hours in seconds
+PROFILE_CACHE_EXPIRY = 60 * 60  # safety net; writes invalidate explicitly
+# Bumped whenever the stored layout changes; entries in the old layout just expire
+CACHE_VERSION = 3
+
+# Transcript bodies are compressed once, when the cache is filled, so the
+# expensive settings are affordable
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+# Stored variants in server preference order (also the hash field names)
+ENCODINGS = ("br", "gzip", "identity")
+
+# Range reads: the snippets are also stored in chunks of CHUNK_SIZE next to
+# two packed float64 arrays (machine byte order) to binary-search them by time:
+# `starts` (snippet start times) and `ends` (running maximum of end times, so it
+# is sorted even when captions overlap). `meta` holds the transcript's
+# metadata and snippet count.
+CHUNK_SIZE = 200
+INDEX_FIELDS = ("meta", "starts", "ends")
+
+# Returns {field, value} for the first of `fields` present in the hash, or false.
+FIRST_VARIANT_LUA = """
+local function first_variant(key, fields)
+    for _, field in ipairs(fields) do
+        local value = redis.call('HGET', key, field)
+        if value then
+            return {field, value}
+        end
+    end
+    return false
+end
+"""
+
+# Write-back of a profile read on a cache miss, only if no invalidation ran since
+# the miss: a profile read from the database before a concurrent write committed
+# must not outlive that write's invalidation.
+# KEYS[1] = profile key, KEYS[2] = generation counter;
+# ARGV[1] = generation seen at the miss ('' if none), ARGV[2] = profile JSON, ARGV[3] = TTL
+_set_profile_if_current = r.register_script("""
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+""")
+
+# KEYS[1] = transcript hash; ARGV = acceptable encodings, best first.
+# Called with client= so it runs on whichever node holds the key.
+_first_variant = rb.register_script(FIRST_VARIANT_LUA + "return first_variant(KEYS[1], ARGV)")
+
+
+class EncodedBody(NamedTuple):
+    """A ready-to-send transcript response body."""
+
+    encoding: str  # Content-Encoding, or "identity"
+    body: bytes
+
+
+def compress_variants(body: bytes) -> dict[str, bytes]:
+    """Every stored representation of one response body (CPU-heavy: run off the event loop)."""
+    variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return variants
+
+
+def accepted_encodings(accept_encoding: str | None) -> list[str]:
+    """Stored encodings the client accepts, best first; identity is always the last resort."""
+    qualities: dict[str, float] = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[name] = q
+
+    wildcard = qualities.get("*", 0.0)
+    ranked = [(qualities.get(enc, wildcard), enc) for enc in ENCODINGS[:-1]]
+    # sort is stable, so equal q-values keep the server preference order
+    ranked.sort(key=lambda item: -item[0])
+    return [enc for q, enc in ranked if q > 0] + ["identity"]
+
+
+class TranscriptIndex(NamedTuple):
+    """The part of a cached transcript needed to locate a slice of it."""
+
+    meta: dict
+    starts: array
+    ends: array
+
+    @classmethod
+    def decode(cls, meta: bytes, starts: bytes, ends: bytes) -> "TranscriptIndex":
+        index = cls(orjson.loads(meta), array("d"), array("d"))
+        index.starts.frombytes(starts)
+        index.ends.frombytes(ends)
+        return index
+
+
+def _chunk_field(n: int) -> str:
+    return f"chunk:{n}"
+
+
+def index_fields(meta: dict, snippets: list[dict]) -> dict[str, bytes]:
+    """Hash fields for range reads: meta, the start/end arrays and the snippet chunks."""
+    ends = itertools.accumulate((snippet["start"] + snippet["duration"] for snippet in snippets), max)
+    fields = {
+        "meta": orjson.dumps(dict(meta, snippets=len(snippets))),
+        "starts": array("d", (snippet["start"] for snippet in snippets)).tobytes(),
+        "ends": array("d", ends).tobytes(),
+    }
+    for n in range(0, len(snippets), CHUNK_SIZE):
+        fields[_chunk_field(n // CHUNK_SIZE)] = orjson.dumps(snippets[n:n + CHUNK_SIZE])
+    return fields
+
 
 class CacheService:
     @staticmethod
     def _build_key(video_id: str, language: str) -> str:
         """Create a consistent cache key for transcripts."""
-        return f"transcript:{video_id}:{language}"
+        return f"transcript:v{CACHE_VERSION}:{video_id}:{language}"
 
     @staticmethod
-    async def get_transcript(video_id: str, language: str) -> dict | None:
-        """Retrieve transcript from Redis if it exists."""
+    async def _on_cache_node(key: str, op, default=None):
+        """
+        Run `op(client)` on the node that holds `key`: its shard when
+        REDIS_CACHE_NODES is set (a dead shard yields `default`, i.e. a miss),
+        otherwise the primary.
+        """
+        shard = cache_shards.shard_for(key)
+        if shard is None:
+            return await op(rb)
+        return await cache_shards.on_shard(shard, op, default)
+
+    @staticmethod
+    async def get_transcript(video_id: str, language: str, encodings: list[str]) -> EncodedBody | None:
+        """The best cached variant among `encodings`, fetched without reading the others."""
+        key = CacheService._build_key(video_id, language)
+        with span("cache.get", key=key):
+            found = await CacheService._on_cache_node(
+                key, lambda client: _first_variant(keys=[key], args=encodings, client=client)
+            )
+        return EncodedBody(found[0].decode(), found[1]) if found else None
+
+    @staticmethod
+    async def get_index(video_id: str, language: str) -> TranscriptIndex | None:
+        """The cached start/end arrays of a transcript, without any snippet text."""
+        key = CacheService._build_key(video_id, language)
+        with span("cache.get_index", key=key):
+            meta, starts, ends = await CacheService._on_cache_node(
+                key, lambda client: client.hmget(key, INDEX_FIELDS), [None] * len(INDEX_FIELDS)
+            )
+        if meta is None or starts is None or ends is None:
+            return None
+        return TranscriptIndex.decode(meta, starts, ends)
+
+    @staticmethod
+    async def get_snippets(video_id: str, language: str, lo: int, hi: int) -> list[dict] | None:
+        """Snippets lo..hi-1, reading only the chunks that hold them (None if the entry expired)."""
+        if lo >= hi:
+            return []
+        first, last = lo // CHUNK_SIZE, (hi - 1) // CHUNK_SIZE
         key = CacheService._build_key(video_id, language)
-        data = await r.get(key)
-        return json.loads(data) if data else None
+        with span("cache.get_chunks", key=key, chunks=last - first + 1):
+            fields = [_chunk_field(n) for n in range(first, last + 1)]
+            chunks = await CacheService._on_cache_node(key, lambda client: client.hmget(key, fields))
+        if chunks is None or any(chunk is None for chunk in chunks):
+            return None
+        snippets = [snippet for chunk in chunks for snippet in orjson.loads(chunk)]
+        base = first * CHUNK_SIZE
+        return snippets[lo - base:hi - base]
+
+    @staticmethod
+    async def are_cached(video_ids: list[str], language: str = "default") -> list[bool]:
+        """Whether each video's transcript is cached: one pipelined round trip per node, run concurrently."""
+        keys = [CacheService._build_key(video_id, language) for video_id in video_ids]
+        by_node: dict[str, list[str]] = {}
+        for key in keys:
+            by_node.setdefault(getattr(cache_shards.shard_for(key), "name", ""), []).append(key)
+
+        async def probe(node_keys: list[str]) -> dict[str, bool]:
+            async def exists(client):
+                pipe = client.pipeline(transaction=False)
+                for key in node_keys:
+                    pipe.exists(key)
+                return await pipe.execute()
+
+            # Every key of the group lives on the node node_keys[0] routes to
+            found = await CacheService._on_cache_node(node_keys[0], exists, [0] * len(node_keys))
+            return dict(zip(node_keys, map(bool, found)))
+
+        cached: dict[str, bool] = {}
+        for result in await asyncio.gather(*(probe(node_keys) for node_keys in by_node.values())):
+            cached.update(result)
+        return [cached[key] for key in keys]
 
     @staticmethod
-    async def set_transcript(video_id: str, language: str, transcript_data: dict):
-        """Save transcript in Redis with 24h TTL."""
+    async def set_transcript(video_id: str, language: str, fields: dict[str, bytes]):
+        """Save the encoded response body variants and range-index fields in one hash with 24h TTL."""
         key = CacheService._build_key(video_id, language)
-        await r.set(key, json.dumps(transcript_data), ex=CACHE_EXPIRY)
+        async def write(client):
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, CACHE_EXPIRY)
+            await pipe.execute()
+
+        with span("cache.set", key=key):
+            # On a dead shard the write is dropped; the next request refetches
+            await CacheService._on_cache_node(key, write)
+
+    @staticmethod
+    def _profile_key(user_id) -> str:
+        return f"profile:{user_id}"
+
+    @staticmethod
+    def _profile_generation_key(user_id) -> str:
+        return f"profile:gen:{user_id}"
+
+    @staticmethod
+    async def get_user_profile(user_id) -> tuple[dict | None, str]:
+        """
+        A cached `/auth/me` profile (None on a miss) and the profile's current
+        generation, to be handed back to set_user_profile after a miss.
+        """
+        data, generation = await r.mget(
+            CacheService._profile_key(user_id), CacheService._profile_generation_key(user_id)
+        )
+        return (json.loads(data) if data else None), generation or ""
+
+    @staticmethod
+    async def set_user_profile(user_id, profile: dict, generation: str) -> bool:
+        """Cache `profile` unless it was invalidated after `generation` was read (then it may be stale)."""
+        stored = await _set_profile_if_current(
+            keys=[CacheService._profile_key(user_id), CacheService._profile_generation_key(user_id)],
+            args=[generation, json.dumps(profile), PROFILE_CACHE_EXPIRY],
+        )
+        return bool(stored)
+
+    @staticmethod
+    async def invalidate_user_profile(user_id):
+        """Must be called by every write path that changes profile fields, after its commit."""
+        generation_key = CacheService._profile_generation_key(user_id)
+        pipe = r.pipeline(transaction=True)
+        pipe.incr(generation_key)
+        # Only needs to outlive a miss that is still in flight
+        pipe.expire(generation_key, PROFILE_CACHE_EXPIRY)
+        pipe.delete(CacheService._profile_key(user_id))
+        await pipe.execute()
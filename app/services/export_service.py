@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from app.core.config import EXPORT_BATCH_SIZE
+from app.core.database import SessionLocal
+from app.core.logger import logger
+from app.models.audit import TranscriptAudit
+from app.models.audit_rollup import TranscriptAuditRollup
+from app.models.user import User
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+USER_EXPORT_COLUMNS = [
+    User.id, User.name, User.email, User.role,
+    User.is_verified, User.created_at, User.last_login,
+]
+AUDIT_EXPORT_COLUMNS = [
+    TranscriptAudit.id, TranscriptAudit.video_id,
+    TranscriptAudit.user_id, TranscriptAudit.created_at,
+]
+AUDIT_ROLLUP_EXPORT_COLUMNS = [
+    TranscriptAuditRollup.day, TranscriptAuditRollup.video_id,
+    TranscriptAuditRollup.user_id, TranscriptAuditRollup.request_count,
+]
+
+
+def _to_value(value):
+    """Flatten DB values (enums, datetimes) into plain JSON/CSV-friendly types."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum members such as UserRole
+        return value.value
+    return value
+
+
+class ExportService:
+    @staticmethod
+    def stream_users(
+        fmt: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[str]:
+        """Stream every user (without password hashes) created inside the range."""
+        stmt = select(*USER_EXPORT_COLUMNS).order_by(User.id)
+        if start:
+            stmt = stmt.filter(User.created_at >= start)
+        if end:
+            stmt = stmt.filter(User.created_at < end)
+        return ExportService._stream(stmt, fmt, "users")
+
+    @staticmethod
+    def stream_audits(
+        fmt: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Iterator[str]:
+        """
+        Stream raw transcript audit rows created inside the range. Rows older
+        than the retention cutoff have been rolled up (see stream_audit_rollups).
+        """
+        stmt = select(*AUDIT_EXPORT_COLUMNS).order_by(TranscriptAudit.id)
+        if start:
+            stmt = stmt.filter(TranscriptAudit.created_at >= start)
+        if end:
+            stmt = stmt.filter(TranscriptAudit.created_at < end)
+        return ExportService._stream(stmt, fmt, "audits")
+
+    @staticmethod
+    def stream_audit_rollups(
+        fmt: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Iterator[str]:
+        """Stream the per-day counts of audits that aged out of the raw table, for days inside the range."""
+        stmt = select(*AUDIT_ROLLUP_EXPORT_COLUMNS).order_by(TranscriptAuditRollup.day, TranscriptAuditRollup.id)
+        if start:
+            stmt = stmt.filter(TranscriptAuditRollup.day >= start)
+        if end:
+            stmt = stmt.filter(TranscriptAuditRollup.day < end)
+        return ExportService._stream(stmt, fmt, "audit rollups")
+
+    @staticmethod
+    def _stream(stmt, fmt: str, name: str) -> Iterator[str]:
+        """
+        Run the query on a server-side cursor and yield one encoded chunk per
+        fetched batch, so memory stays bounded by EXPORT_BATCH_SIZE rows.
+
+        The session is owned by the generator (not the request dependency)
+        because the body keeps streaming after the route function returns.
+        """
+        db = SessionLocal()
+        rows_sent = 0
+        try:
+            result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+            columns = list(result.keys())
+            buffer = io.StringIO()
+            writer = csv.writer(buffer) if fmt == "csv" else None
+
+            if writer:
+                writer.writerow(columns)
+
+            for batch in result.partitions():
+                for row in batch:
+                    values = [_to_value(v) for v in row]
+                    if writer:
+                        writer.writerow(values)
+                    else:
+                        buffer.write(json.dumps(dict(zip(columns, values))))
+                        buffer.write("\n")
+                rows_sent += len(batch)
+
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+            # Header-only CSV for empty exports
+            if buffer.tell():
+                yield buffer.getvalue()
+
+            logger.info("Export of %s finished: %s rows as %s", name, rows_sent, fmt)
+        finally:
+            db.close()
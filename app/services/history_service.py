@@ -0,0 +1,82 @@
+import asyncio
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import exists, select, tuple_
+from sqlalchemy.orm import Session, aliased
+
+from app.models.audit import TranscriptAudit
+from app.services.cache_service import CacheService
+
+
+class HistoryService:
+    """
+    A user's fetch history, read from the raw `transcript_audits` rows (so it
+    only reaches back AUDIT_RETENTION_DAYS; older audits are rolled up
+    without timestamps). Each video appears once, at its latest fetch.
+    """
+
+    @staticmethod
+    def _encode_cursor(created_at: datetime, audit_id: int) -> str:
+        raw = json.dumps([created_at.isoformat(), audit_id]).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            created_at, audit_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(created_at), int(audit_id)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    @staticmethod
+    def get_page(db: Session, user_id: int, limit: int, cursor: Optional[str] = None) -> tuple[list, Optional[str]]:
+        """
+        One page of (video_id, last fetched at), newest first, and the cursor
+        for the next page. Keyset pagination on (created_at, id): a page walks
+        ix_transcript_audits_user_created from the cursor, and each row is
+        kept only if no newer audit exists for the same video (one probe of
+        ix_transcript_audits_user_video_created), so the cost of a page does
+        not grow with the length of the history.
+        """
+        audit = TranscriptAudit
+        newer = aliased(TranscriptAudit)
+        query = (
+            select(audit.id, audit.video_id, audit.created_at)
+            .where(audit.user_id == user_id)
+            .where(~exists().where(
+                newer.user_id == audit.user_id,
+                newer.video_id == audit.video_id,
+                tuple_(newer.created_at, newer.id) > tuple_(audit.created_at, audit.id),
+            ))
+            .order_by(audit.created_at.desc(), audit.id.desc())
+            .limit(limit + 1)  # one extra row tells whether there is a next page
+        )
+        if cursor:
+            created_at, audit_id = HistoryService._decode_cursor(cursor)
+            query = query.where(tuple_(audit.created_at, audit.id) < tuple_(created_at, audit_id))
+
+        rows = db.execute(query).all()
+        db.rollback()  # read-only: hand the connection back before the cache probe
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = HistoryService._encode_cursor(rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    async def get_history(
+        db: Session, user_id: int, limit: int, cursor: Optional[str] = None, include_cached: bool = False
+    ) -> dict:
+        # Synchronous query: keep it off the event loop
+        rows, next_cursor = await asyncio.to_thread(HistoryService.get_page, db, user_id, limit, cursor)
+        items = [{"video_id": row.video_id, "last_fetched_at": row.created_at} for row in rows]
+        if include_cached and items:
+            # /v1/transcripts?video_id=... (no language) reopens the default-language entry
+            flags = await CacheService.are_cached([item["video_id"] for item in items])
+            for item, cached in zip(items, flags):
+                item["cached"] = cached
+        return {"items": items, "next_cursor": next_cursor}
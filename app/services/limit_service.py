@@ -1,47 +1,116 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import List
+
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import GUEST_DAILY_LIMIT, GUEST_LIMIT_WINDOW_SECONDS
+from app.core.database import SessionLocal
+from app.core.logger import logger
+from app.core.redis import r
 from app.models.usage import AnonymousUsage
-from datetime import date
+
+# Counters outlive their window a little so the Postgres sync can still read them
+SYNC_GRACE_SECONDS = 60 * 60
+SYNC_BATCH_SIZE = 500
+
+# counter_key = per-IP counter for the current window, dirty_key = "dirty" set for the sync
+# Returns the new count, or -1 when the IP is already at the limit. Runs inside
+# AdmissionService's script, in the same round trip as the rest of admission.
+GUEST_LIMIT_LUA = """
+local function guest_limit(counter_key, dirty_key, limit, window_end, ip)
+    local count = tonumber(redis.call('GET', counter_key) or '0')
+    if count >= limit then
+        return -1
+    end
+    count = redis.call('INCR', counter_key)
+    local expire_at = window_end + %d
+    if count == 1 then
+        redis.call('EXPIREAT', counter_key, expire_at)
+    end
+    redis.call('SADD', dirty_key, ip)
+    redis.call('EXPIREAT', dirty_key, expire_at)
+    return count
+end
+""" % SYNC_GRACE_SECONDS
+
 
 class LimitService:
     @staticmethod
-    def check_anonymous_limit(db: Session, ip: str) -> bool:
-        today = date.today()
-        record = db.query(AnonymousUsage).filter(AnonymousUsage.ip_address == ip).first()
-
-        if not record:
-            # First time ever for this IP
-            new_record = AnonymousUsage(ip_address=ip, request_count=1, last_request_date=today)
-            db.add(new_record)
-            db.commit()
-            return True
+    def _window(now: float | None = None) -> tuple[int, int]:
+        """Return (window id, window end as unix ts); daily windows reset at midnight UTC."""
+        now = time.time() if now is None else now
+        window_id = int(now // GUEST_LIMIT_WINDOW_SECONDS)
+        return window_id, (window_id + 1) * GUEST_LIMIT_WINDOW_SECONDS
 
-        # Reset count if it's a new day
-        if record.last_request_date < today:
-            record.request_count = 1
-            record.last_request_date = today
-            db.commit()
-            return True
+    @staticmethod
+    def _counter_key(window_id: int, ip: str) -> str:
+        return f"guestlimit:{window_id}:{ip}"
+
+    @staticmethod
+    def _dirty_key(window_id: int) -> str:
+        return f"guestlimit:dirty:{window_id}"
+
+    @staticmethod
+    async def sync_anonymous_usage() -> int:
+        """
+        Copy guest counters touched since the last run into `anonymous_usage`
+        (analytics only). Also drains the previous window so late writes are kept.
+        """
+        current_window, _ = LimitService._window()
+        synced = 0
+        for window_id in (current_window - 1, current_window):
+            dirty_key = LimitService._dirty_key(window_id)
+            window_date = datetime.fromtimestamp(window_id * GUEST_LIMIT_WINDOW_SECONDS, tz=timezone.utc).date()
 
-        # Check if under the 5-request limit
-        if record.request_count < 5:
-            record.request_count += 1
+            while True:
+                ips = await r.spop(dirty_key, SYNC_BATCH_SIZE)
+                if not ips:
+                    break
+                counts = await r.mget([LimitService._counter_key(window_id, ip) for ip in ips])
+                rows = [
+                    {"ip_address": ip, "request_count": int(count), "last_request_date": window_date}
+                    for ip, count in zip(ips, counts) if count is not None
+                ]
+                try:
+                    await asyncio.to_thread(LimitService._upsert_usage, rows)
+                except Exception:
+                    # Put them back so the next run retries
+                    await r.sadd(dirty_key, *ips)
+                    raise
+                synced += len(rows)
+
+        if synced:
+            logger.info("Synced %s guest usage counters to Postgres", synced)
+        return synced
+
+    @staticmethod
+    def _upsert_usage(rows: List[dict]):
+        if not rows:
+            return
+        stmt = insert(AnonymousUsage).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnonymousUsage.ip_address],
+            set_={
+                "request_count": stmt.excluded.request_count,
+                "last_request_date": stmt.excluded.last_request_date,
+            },
+        )
+        with SessionLocal() as db:
+            db.execute(stmt)
             db.commit()
-            return True
 
-        return False # Limit reached
-    
     @staticmethod
     def get_anonymous_stats(db: Session):
         """
-        Calculates distinct anonymous users and those who hit the limit.
+        Counts guests who hit the limit. Distinct guest totals come from the
+        HyperLogLog sketches in ActivityService instead of a full table count.
         """
-        # 1. Total distinct IPs in our tracking table
-        total_anon = db.query(AnonymousUsage).count()
-        
-        # 2. Users who have reached 5 (or more) requests
-        power_guests = db.query(AnonymousUsage).filter(AnonymousUsage.request_count >= 5).count()
-        
+        # Guests who have reached the limit (as of the last Redis sync)
+        power_guests = db.query(AnonymousUsage).filter(AnonymousUsage.request_count >= GUEST_DAILY_LIMIT).count()
+
         return {
-            "total_anonymous": total_anon,
             "power_guests": power_guests
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.core.config import (
+    AUDIT_RETENTION_DAYS,
+    AUDIT_RETENTION_BATCH_SIZE,
+    AUDIT_RETENTION_BATCH_PAUSE,
+)
+from app.core.database import get_engine
+from app.core.logger import logger
+from app.models.audit_rollup import TranscriptAuditRollup  # noqa: F401  (registers the table)
+
+# Arbitrary app-wide key so only one worker/cron compacts at a time
+RETENTION_LOCK_KEY = 72_801
+
+# Delete one small batch of expired audits and fold it into the rollups in the
+# same statement, so a crash can never double-count or lose rows.
+COMPACT_BATCH_SQL = text("""
+    WITH batch AS (
+        SELECT id FROM transcript_audits
+        WHERE created_at < :cutoff
+        ORDER BY created_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ), moved AS (
+        DELETE FROM transcript_audits a
+        USING batch
+        WHERE a.id = batch.id
+        RETURNING a.video_id, a.user_id, a.created_at
+    ), rolled AS (
+        INSERT INTO transcript_audit_rollups (day, video_id, user_id, request_count)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, video_id, user_id, count(*)
+        FROM moved
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, video_id, user_id)
+        DO UPDATE SET request_count = transcript_audit_rollups.request_count + EXCLUDED.request_count
+    )
+    SELECT count(*) FROM moved
+""")
+
+
+class RetentionService:
+    @staticmethod
+    def cutoff(retention_days: int = AUDIT_RETENTION_DAYS) -> datetime:
+        """Raw audits created before this (UTC midnight) are rolled up and deleted."""
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        return today - timedelta(days=retention_days)
+
+    @staticmethod
+    def compact_audits(
+        retention_days: int = AUDIT_RETENTION_DAYS,
+        batch_size: int = AUDIT_RETENTION_BATCH_SIZE,
+        pause: float = AUDIT_RETENTION_BATCH_PAUSE,
+    ) -> int:
+        """
+        Roll raw audits older than `retention_days` (whole UTC days) into
+        `transcript_audit_rollups` and delete them, one short transaction per
+        batch. Returns the number of raw rows compacted.
+        """
+        cutoff = RetentionService.cutoff(retention_days)
+        total = 0
+
+        # Session-level advisory locks belong to a connection, so hold one
+        # connection for the whole run instead of going through a Session.
+        with get_engine().connect() as conn:
+            got_lock = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": RETENTION_LOCK_KEY}
+            ).scalar()
+            conn.commit()
+            if not got_lock:
+                logger.info("Audit compaction already running elsewhere, skipping.")
+                return 0
+
+            try:
+                while True:
+                    moved = conn.execute(
+                        COMPACT_BATCH_SQL, {"cutoff": cutoff, "batch_size": batch_size}
+                    ).scalar()
+                    conn.commit()
+                    total += moved
+                    if moved < batch_size:
+                        break
+                    # Give autovacuum and concurrent inserts room between batches
+                    time.sleep(pause)
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": RETENTION_LOCK_KEY})
+                conn.commit()
+
+        if total:
+            logger.info("🧹 Compacted %s transcript audits older than %s", total, cutoff.date())
+        return total
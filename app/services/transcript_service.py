@@ -1,9 +1,11 @@
 import asyncio
+import time
+import orjson
+from bisect import bisect_left, bisect_right
 from typing import Optional
 from app.models.audit import TranscriptAudit
-from app.services.cache_service import CacheService
-from youtube_transcript_api import YouTubeTranscriptApi
-from app.utils.transcript_utils import format_transcript, format_timestamp
+from app.services.cache_service import CacheService, EncodedBody, TranscriptIndex, compress_variants, index_fields
+from app.utils.transcript_utils import clean_text, format_srt, format_transcript
 from app.core.exceptions import (
     VideoUnavailableError,
     VideoPrivateError,
@@ -11,94 +13,202 @@ from app.core.exceptions import (
     TranscriptFetchError,
 )
 from app.core.logger import logger  # make sure this is imported
+from app.core.metrics import CACHE_REQUESTS, UPSTREAM_FETCH_LATENCY
+from app.core.proxy_pool import proxy_pool
+from app.core.tracing import span
 from sqlalchemy.orm import Session
 
 async def get_transcript(
     db: Session, 
     video_id: str, 
     user_id: int,  # Now strictly required
-    language: Optional[str] = None) -> dict:
+    language: Optional[str] = None,
+    encodings: tuple[str, ...] | list[str] = ("identity",),
+    cached: Optional[EncodedBody] = None) -> EncodedBody:
     """
     Async transcript fetcher with Redis caching and detailed logging.
+    Returns the complete success response body in the best of `encodings`
+    (see accepted_encodings): cache hits are passed through untouched and
+    misses are encoded and compressed once, then cached in every encoding.
+    `cached` is an entry the caller already read (AdmissionService); the
+    cache is only queried here when it is missing.
     """
     cache_key_lang = language or "default"
-    logger.info(f"Transcript request received: video_id={video_id}, language={cache_key_lang}")
+    logger.info("Transcript request received: video_id=%s, language=%s", video_id, cache_key_lang)
 
     # 1. Try cache first
-    cached = await CacheService.get_transcript(video_id, cache_key_lang)
+    if cached is None:
+        cached = await CacheService.get_transcript(video_id, cache_key_lang, list(encodings))
     if cached:
-        logger.info(
-            f"Cache HIT: transcript found for video_id={video_id}, language={cache_key_lang}"
-        )
+        CACHE_REQUESTS.labels("hit").inc()
+        logger.info("Cache HIT: transcript found for video_id=%s, language=%s", video_id, cache_key_lang)
         # LOG AUDIT ON CACHE HIT
         _log_audit(db, video_id, user_id)
         return cached
 
+    CACHE_REQUESTS.labels("miss").inc()
     logger.info(
-        f"Cache MISS: no cached transcript for video_id={video_id}, "
-        f"language={cache_key_lang}. Fetching from YouTube API..."
+        "Cache MISS: no cached transcript for video_id=%s, language=%s. Fetching from YouTube API...",
+        video_id, cache_key_lang
     )
+    fields, _ = await _fetch_and_cache(video_id, language, cache_key_lang)
+
+    # LOG AUDIT ON NEW FETCH
+    _log_audit(db, video_id, user_id)
+
+    encoding = next(enc for enc in encodings if enc in fields)
+    return EncodedBody(encoding, fields[encoding])
+
+
+async def get_transcript_range(
+    db: Session,
+    video_id: str,
+    user_id: int,
+    language: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    offset: int = 0,
+    limit: Optional[int] = None) -> bytes:
+    """
+    A slice of a transcript: the snippets running between `start` and `end`
+    (seconds), then `offset`/`limit` within those. Returns the encoded
+    success response body. On a cache hit the slice is located by binary
+    search over the cached start/end arrays and only the snippet chunks it
+    overlaps are read, so the cost follows the slice, not the video.
+    """
+    cache_key_lang = language or "default"
+    logger.info(
+        "Transcript range request received: video_id=%s, language=%s, start=%s, end=%s, offset=%s, limit=%s",
+        video_id, cache_key_lang, start, end, offset, limit,
+    )
+
+    snippets = None
+    index = await CacheService.get_index(video_id, cache_key_lang)
+    if index is not None:
+        lo, hi, total = _locate(index.starts, index.ends, start, end, offset, limit)
+        snippets = await CacheService.get_snippets(video_id, cache_key_lang, lo, hi)
+        meta = index.meta
+
+    if snippets is not None:
+        CACHE_REQUESTS.labels("hit").inc()
+        logger.info("Cache HIT: transcript index found for video_id=%s, language=%s", video_id, cache_key_lang)
+    else:
+        CACHE_REQUESTS.labels("miss").inc()
+        logger.info(
+            "Cache MISS: no cached transcript for video_id=%s, language=%s. Fetching from YouTube API...",
+            video_id, cache_key_lang
+        )
+        fields, all_snippets = await _fetch_and_cache(video_id, language, cache_key_lang)
+        index = TranscriptIndex.decode(fields["meta"], fields["starts"], fields["ends"])
+        lo, hi, total = _locate(index.starts, index.ends, start, end, offset, limit)
+        snippets = all_snippets[lo:hi]
+        meta = index.meta
+
+    _log_audit(db, video_id, user_id)
+
+    with span("transcript.format", snippets=len(snippets)):
+        data = {
+            "video_id": video_id,
+            "language": meta["language"],
+            "language_code": meta["language_code"],
+            "start": start,
+            "end": end,
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "snippets": [dict(snippet, index=idx) for idx, snippet in enumerate(snippets, start=lo + 1)],
+            "transcript": clean_text(" ".join(snippet["text"] for snippet in snippets)),
+            "transcript_with_timestamps": format_srt(snippets, first_index=lo + 1),
+        }
+        return orjson.dumps({"status": "success", "code": 200, "data": data})
 
-    loop = asyncio.get_event_loop()
 
-    # 2. Run the blocking fetch in a thread executor
-    def _fetch():
-        ytt_api = YouTubeTranscriptApi()
+def _locate(starts, ends, start, end, offset, limit) -> tuple[int, int, int]:
+    """
+    (lo, hi, total): the snippet positions to return and how many snippets
+    fall in the time range before offset/limit. The range holds every
+    snippet from the first one still running at `start` (the running-max
+    `ends` array is sorted) up to the last one starting before `end`.
+    """
+    first = 0 if start is None else bisect_right(ends, start)
+    last = len(starts) if end is None else bisect_left(starts, end)
+    last = max(first, last)
+    lo = min(first + offset, last)
+    hi = last if limit is None else min(lo + limit, last)
+    return lo, hi, last - first
+
+
+async def _fetch_and_cache(video_id: str, language: Optional[str], cache_key_lang: str):
+    """
+    Fetch from YouTube and fill the cache. Returns the cached hash fields
+    (the full response body in every encoding, next to the range index) and
+    the snippets as dicts.
+    """
+    # 2. Run the blocking fetch in a thread executor, through an egress proxy
+    def _fetch(proxy_config):
+        # Imported on first cache miss rather than at worker boot
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        ytt_api = YouTubeTranscriptApi(proxy_config=proxy_config)
         if language:
             return ytt_api.fetch(video_id, languages=[language])
         return ytt_api.fetch(video_id)
 
+    fetch_started = time.perf_counter()
     try:
-        transcript = await loop.run_in_executor(None, _fetch)
-        logger.info(f"Fetched transcript from YouTube API for video_id={video_id}")
+        transcript = await proxy_pool.fetch(_fetch, video_id=video_id)
+        UPSTREAM_FETCH_LATENCY.labels("success").observe(time.perf_counter() - fetch_started)
+        logger.info("Fetched transcript from YouTube API for video_id=%s", video_id)
     except Exception as e:
-        logger.error(f"Error fetching transcript from YouTube API for video_id={video_id}: {e}")
+        fetch_time = time.perf_counter() - fetch_started
+        logger.error("Error fetching transcript from YouTube API for video_id=%s: %s", video_id, e)
         if "VideoUnavailable" in str(e):
+            UPSTREAM_FETCH_LATENCY.labels("unavailable").observe(fetch_time)
             raise VideoUnavailableError("Video unavailable or deleted")
         elif "TranscriptsDisabled" in str(e):
+            UPSTREAM_FETCH_LATENCY.labels("disabled").observe(fetch_time)
             raise VideoPrivateError("Transcript disabled or video private")
         elif "NoTranscriptFound" in str(e):
+            UPSTREAM_FETCH_LATENCY.labels("no_transcript").observe(fetch_time)
             raise LanguageNotSupportedError("Transcript not available in requested language")
         else:
+            UPSTREAM_FETCH_LATENCY.labels("error").observe(fetch_time)
             raise TranscriptFetchError(str(e))
 
     # 3. Build transcript with timestamps
-    lines = []
-    for idx, snippet in enumerate(transcript.snippets, start=1):
-        start_time = format_timestamp(snippet.start)
-        end_time = format_timestamp(snippet.start + snippet.duration)
-        lines.append(f"{idx}\n{start_time} --> {end_time}\n{snippet.text}\n")
-
-    data = format_transcript(transcript)
+    with span("transcript.format", snippets=len(transcript.snippets)):
+        snippets = [
+            {"text": snippet.text, "start": snippet.start, "duration": snippet.duration}
+            for snippet in transcript.snippets
+        ]
+        data = format_transcript(transcript)
 
+    meta = {"language": transcript.language, "language_code": transcript.language_code}
     result = {
         "video_id": video_id,
-        "language": transcript.language,
-        "language_code": transcript.language_code,
+        **meta,
         "transcript": data,
-        "transcript_with_timestamps": "\n".join(lines),
+        "transcript_with_timestamps": format_srt(snippets),
     }
 
-    # 4. Save into cache (async, doesn’t block)
-    await CacheService.set_transcript(video_id, cache_key_lang, result)
-    
-    # LOG AUDIT ON NEW FETCH
-    _log_audit(db, video_id, user_id)
-    
-    logger.info(
-        f"Transcript cached for video_id={video_id}, language={cache_key_lang}, "
-        f"expiry=24h"
-    )
-
-    return result
+    # 4. Save into cache (async, doesn’t block); compression runs off the event loop
+    body = orjson.dumps({"status": "success", "code": 200, "data": result})
+    with span("transcript.compress", bytes=len(body)):
+        fields = await asyncio.to_thread(
+            lambda: {**compress_variants(body), **index_fields(meta, snippets)}
+        )
+    await CacheService.set_transcript(video_id, cache_key_lang, fields)
+    logger.info("Transcript cached for video_id=%s, language=%s, expiry=24h", video_id, cache_key_lang)
+    return fields, snippets
 
 
 def _log_audit(db: Session, video_id: str, user_id: int):
     """Helper to record activity for Admin Analytics."""
     try:
-        new_audit = TranscriptAudit(video_id=video_id, user_id=user_id)
-        db.add(new_audit)
-        db.commit()
+        with span("audit.insert"):
+            new_audit = TranscriptAudit(video_id=video_id, user_id=user_id)
+            db.add(new_audit)
+            db.commit()
     except Exception as e:
         db.rollback()
-        logger.error(f"Critical: Failed to log transcript audit for user {user_id}: {e}")
\ No newline at end of file
+        logger.error("Critical: Failed to log transcript audit for user %s: %s", user_id, e)
\ No newline at end of file
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.logger import logger
+from app.core.redis import r
+
+# Widest window /admin/trending reports, in hourly buckets
+MAX_WINDOW_HOURS = 24 * 7
+# Buckets outlive the widest window by an hour so it is always complete
+BUCKET_RETENTION = 60 * 60 * (MAX_WINDOW_HOURS + 1)
+# Merged windows are just a short-lived scratch result
+MERGED_TTL = 60
+
+
+class TrendingService:
+    """
+    Served requests per video as one Redis sorted set per UTC hour. Cache
+    hits are counted by the admission script, fetched misses and range reads
+    by record() once they succeed; failed or invalid ids are never counted.
+    A window is the ZUNIONSTORE of its hourly buckets, so ranking costs
+    O(distinct videos in the window) and never touches transcript_audits.
+    Counts are per video across languages; the current hour is partial.
+    """
+
+    @staticmethod
+    def _bucket_key(hour: datetime) -> str:
+        return f"trending:{hour:%Y%m%d%H}"
+
+    @staticmethod
+    def current_bucket() -> str:
+        """The sorted set the running hour's requests are counted in."""
+        return TrendingService._bucket_key(datetime.now(timezone.utc))
+
+    @staticmethod
+    async def record(video_id: str):
+        """Count one successfully served request for `video_id` in the current hour (best effort)."""
+        key = TrendingService.current_bucket()
+        try:
+            pipe = r.pipeline(transaction=False)
+            pipe.zincrby(key, 1, video_id)
+            pipe.expire(key, BUCKET_RETENTION)
+            await pipe.execute()
+        except Exception as e:
+            # Analytics must never break the transcript request itself
+            logger.warning("Failed to record trending count in %s: %s", key, e)
+
+    @staticmethod
+    async def top(hours: int = 24, limit: int = 10) -> list[dict]:
+        """
+        The `limit` most requested videos over the last `hours` hourly buckets
+        (including the current one), most requested first. Also the list a
+        cache pre-warmer should fill.
+        """
+        now = datetime.now(timezone.utc)
+        bucket_keys = [TrendingService._bucket_key(now - timedelta(hours=i)) for i in range(hours)]
+        merged_key = f"trending:merged:{hours}:{now:%Y%m%d%H}"
+
+        pipe = r.pipeline(transaction=False)
+        pipe.zunionstore(merged_key, bucket_keys)
+        pipe.expire(merged_key, MERGED_TTL)
+        pipe.zrevrange(merged_key, 0, limit - 1, withscores=True)
+        ranking = (await pipe.execute())[2]
+        return [{"video_id": video_id, "requests": int(score)} for video_id, score in ranking]
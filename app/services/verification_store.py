@@ -0,0 +1,55 @@
+import random
+
+from app.core.redis import r
+
+# KEYS[1] = verification hash; ARGV[1] = submitted code, ARGV[2] = max attempts
+# Returns "ok", "invalid", "too_many" or "missing" (never issued / expired / used).
+VERIFY_CODE_SCRIPT = """
+local stored = redis.call('HGET', KEYS[1], 'code')
+if not stored then
+    return 'missing'
+end
+local attempts = tonumber(redis.call('HGET', KEYS[1], 'attempts') or '0')
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return 'too_many'
+end
+if stored == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 'ok'
+end
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return 'invalid'
+"""
+
+_verify_code = r.register_script(VERIFY_CODE_SCRIPT)
+
+
+class VerificationStore:
+    """
+    One active email-verification code per user, held in a Redis hash
+    (code + attempts) that expires on its own. Issuing a new code replaces
+    the old one, which is what "consuming old codes" used to do in SQL.
+    """
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"emailverify:{user_id}"
+
+    @staticmethod
+    def _new_code() -> str:
+        return f"{random.randint(0, 999999):06d}"
+
+    @staticmethod
+    async def issue(user_id: int, ttl_seconds: int) -> str:
+        code = VerificationStore._new_code()
+        key = VerificationStore._key(user_id)
+        pipe = r.pipeline(transaction=True)
+        pipe.hset(key, mapping={"code": code, "attempts": 0})
+        pipe.expire(key, ttl_seconds)
+        await pipe.execute()
+        return code
+
+    @staticmethod
+    async def verify(user_id: int, code: str, max_attempts: int) -> str:
+        return await _verify_code(keys=[VerificationStore._key(user_id)], args=[code, max_attempts])
@@ -0,0 +1,6 @@
+from app.services.retention_service import RetentionService
+
+# One-off / cron entry point:  python -m app.utils.compact_audits
+if __name__ == "__main__":
+    compacted = RetentionService.compact_audits()
+    print(f"Compacted {compacted} transcript audits.")
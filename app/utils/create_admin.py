@@ -1,10 +1,10 @@
-import asyncio
 from app.core.database import SessionLocal
 from app.models.user import User, UserRole
 from app.utils.security import hash_password # Assuming this is your helper name
 from sqlalchemy.future import select
+from app.core.logger import logger
 
-async def create_initial_admin():
+def create_initial_admin():
     db = SessionLocal()
     try:
         # Check if admin already exists
@@ -13,7 +13,7 @@ async def create_initial_admin():
         existing_admin = result.scalars().first()
 
         if existing_admin:
-            print(f"Admin with email {admin_email} already exists.")
+            logger.info("Admin with email %s already exists.", admin_email)
             return
 
         # Create new admin
@@ -27,13 +27,13 @@ async def create_initial_admin():
 
         db.add(new_admin)
         db.commit()
-        print(f"Successfully created ADMIN user: {admin_email}")
+        logger.info("Successfully created ADMIN user: %s", admin_email)
         
-    except Exception as e:
-        print(f"Error creating admin: {e}")
+    except Exception:
+        logger.exception("Error creating admin")
         db.rollback()
     finally:
         db.close()
 
 if __name__ == "__main__":
-    asyncio.run(create_initial_admin())
\ No newline at end of file
+    create_initial_admin()
\ No newline at end of file
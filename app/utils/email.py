@@ -1,34 +1,129 @@
-import os, smtplib, ssl
+import queue
+import smtplib
+import ssl
+import threading
+import time
 from email.message import EmailMessage
 from fastapi import HTTPException, status
 from app.core.logger import logger
+from app.core.metrics import EMAIL_OUTBOX_QUEUE
+from app.core.config import (
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_STARTTLS, SMTP_TIMEOUT,
+    EMAIL_FROM, EMAIL_OUTBOX_MAX_SIZE, EMAIL_MAX_RETRIES, EMAIL_SMTP_IDLE_SECONDS,
+)
 from pydantic import EmailStr, ValidationError, parse_obj_as
 
 
-SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
-SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
-EMAIL_FROM = os.getenv("EMAIL_FROM", SMTP_USER or "no-reply@example.com")
 CODE_TTL_MINUTES = 15
 DISPOSABLE_DOMAINS = {"mailinator.com", "10minutemail.com"}
 
 
+class EmailOutbox:
+    """
+    In-process outbound mail queue. Requests only enqueue; a single sender
+    thread delivers over one persistent SMTP session, retrying with backoff.
+    Messages still queued at shutdown are drained before the thread exits.
+    """
+
+    _STOP = object()
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=EMAIL_OUTBOX_MAX_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._smtp: smtplib.SMTP | None = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 30):
+        """Deliver everything already queued, then close the SMTP session."""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Email outbox did not drain within %ss (%s left)", timeout, self._queue.qsize())
+        self._thread = None
+
+    def enqueue(self, msg: EmailMessage):
+        self.start()
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            logger.error("Email outbox full, dropping email to %s", msg['To'])
+            return
+        EMAIL_OUTBOX_QUEUE.inc()
+
+    # --- sender thread ---
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=EMAIL_SMTP_IDLE_SECONDS)
+            except queue.Empty:
+                # Servers drop idle sessions anyway; close ours cleanly
+                self._disconnect()
+                continue
+            if item is self._STOP:
+                self._disconnect()
+                return
+            try:
+                self._deliver(item)
+            finally:
+                EMAIL_OUTBOX_QUEUE.dec()
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._smtp is None:
+            smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+            if SMTP_STARTTLS:
+                smtp.starttls(context=ssl.create_default_context())
+            if SMTP_USER:
+                smtp.login(SMTP_USER, SMTP_PASSWORD)
+            self._smtp = smtp
+        return self._smtp
+
+    def _disconnect(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                pass
+            self._smtp = None
+
+    def _deliver(self, msg: EmailMessage):
+        for attempt in range(1, EMAIL_MAX_RETRIES + 1):
+            try:
+                self._connect().send_message(msg)
+                logger.info("Email delivered to %s", msg['To'])
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                # Reconnect on the next attempt; the session may be half-dead
+                self._disconnect()
+                if attempt == EMAIL_MAX_RETRIES:
+                    logger.error("Giving up on email to %s after %s attempts: %s", msg['To'], attempt, e)
+                    return
+                backoff = min(2 ** attempt, 60)
+                logger.warning("Email to %s failed (attempt %s), retrying in %ss: %s", msg['To'], attempt, backoff, e)
+                time.sleep(backoff)
+
+
+outbox = EmailOutbox()
+
+
 def send_email(to_email: str, subject: str, html_body: str, text_body: str | None = None):
+    """Queue an email for background delivery; never blocks on SMTP."""
     msg = EmailMessage()
     msg["Subject"] = subject
     msg["From"] = EMAIL_FROM
     msg["To"] = to_email
     if text_body:
-        logger.info("Sending email with both HTML and plain text parts")
         msg.set_content(text_body)
     msg.add_alternative(html_body, subtype="html")
-
-    context = ssl.create_default_context()
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
-        server.starttls(context=context)
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+    outbox.enqueue(msg)
 
 def validate_and_normalize_email(email: str) -> str:
     """
@@ -45,7 +140,7 @@ def validate_and_normalize_email(email: str) -> str:
     try:
         normalized = parse_obj_as(EmailStr, email)
     except ValidationError:
-        logger.warning(f"Invalid email format provided: {email}")
+        logger.warning("Invalid email format provided: %s", email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid email address."
@@ -54,7 +149,7 @@ def validate_and_normalize_email(email: str) -> str:
     # Check for disposable domains
     domain = str(normalized).split("@")[-1]
     if domain in DISPOSABLE_DOMAINS:
-        logger.warning(f"Disposable email not allowed: {email}")
+        logger.warning("Disposable email not allowed: %s", email)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Disposable email not allowed."
@@ -0,0 +1,8 @@
+import sys
+
+from app.core.migrations import run_migrations
+
+# Deploy step, run once before the workers start:  python -m app.utils.migrate [--force]
+if __name__ == "__main__":
+    applied = run_migrations(force="--force" in sys.argv[1:])
+    print("Migrations applied." if applied else "Schema already up to date.")
@@ -1,17 +1,92 @@
 import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from passlib.context import CryptContext
 from jose import jwt, JWTError
-from app.core.config import JWT_SECRET, JWT_ALG, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+    JWT_SECRET, JWT_ALG, ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_POOL_SIZE, PASSWORD_MAX_CONCURRENCY, PASSWORD_MAX_QUEUE,
+)
 from fastapi import HTTPException, status
+from app.core.metrics import PASSWORD_HASH_IN_FLIGHT, PASSWORD_HASH_QUEUE
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_pwd_context = None
+
+def _get_pwd_context():
+    # passlib is only needed in the hashing pool processes and by the admin
+    # bootstrap, so API workers do not pay for importing it at boot
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return _get_pwd_context().verify(password, hashed)
+
+# ---------------------------
+# Password hashing process pool
+# ---------------------------
+# bcrypt is deliberately CPU-heavy; running it in worker processes keeps it
+# off the GIL shared with request handling and lets login bursts use all cores.
+_password_pool: ProcessPoolExecutor | None = None
+_password_slots: asyncio.Semaphore | None = None
+_waiting = 0
+
+def _get_password_pool() -> ProcessPoolExecutor:
+    global _password_pool
+    if _password_pool is None:
+        # "spawn" avoids forking a process that already runs threads and an event loop
+        _password_pool = ProcessPoolExecutor(
+            max_workers=PASSWORD_POOL_SIZE,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _password_pool
+
+async def _run_in_password_pool(fn, *args):
+    global _password_slots, _waiting
+    if _password_slots is None:
+        _password_slots = asyncio.Semaphore(PASSWORD_MAX_CONCURRENCY)
+
+    # Shed load instead of letting the queue (and latency) grow without bound
+    if _waiting >= PASSWORD_MAX_QUEUE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    _waiting += 1
+    PASSWORD_HASH_QUEUE.inc()
+    try:
+        await _password_slots.acquire()
+    finally:
+        _waiting -= 1
+        PASSWORD_HASH_QUEUE.dec()
+
+    PASSWORD_HASH_IN_FLIGHT.inc()
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_password_pool(), fn, *args)
+    finally:
+        PASSWORD_HASH_IN_FLIGHT.dec()
+        _password_slots.release()
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_password_pool(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await _run_in_password_pool(verify_password, password, hashed)
+
+def shutdown_password_pool():
+    global _password_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True, cancel_futures=True)
+        _password_pool = None
 
 def create_access_token(sub: str, role: str) -> str:
     """
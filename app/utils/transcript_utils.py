@@ -4,23 +4,34 @@ from app.core.logger import logger
 
 def format_timestamp(seconds: float) -> str:
     """Converts seconds into SRT-style timestamp format."""
-    logger.debug(f"Formatting timestamp for {seconds} seconds")
     ms = int((seconds - int(seconds)) * 1000)
     t = str(timedelta(seconds=int(seconds)))
     h, m, s = t.split(':')
     formatted_timestamp = f"{int(h):02}:{int(m):02}:{int(s):02},{ms:03}"
-    logger.debug(f"Formatted timestamp: {formatted_timestamp}")
     return formatted_timestamp
 
+def clean_text(raw_text: str) -> str:
+    """Keeps letters, whitespace and sentence punctuation, with whitespace normalized."""
+    # Remove all characters except letters, spaces, and punctuation
+    cleaned_text = re.sub(r'[^a-zA-Z\s.!?]', '', raw_text)
+    # Normalize whitespace
+    return re.sub(r'\s+', ' ', cleaned_text).strip()
+
 def format_transcript(transcript) -> str:
     logger.info("Starting transcript formatting")
     raw_text = ' '.join(snippet.text for snippet in transcript.snippets)
-    logger.debug(f"Raw transcript text length: {len(raw_text)} characters")
+    logger.debug("Raw transcript text length: %d characters", len(raw_text))
 
-    # Remove all characters except letters, spaces, and punctuation
-    cleaned_text = re.sub(r'[^a-zA-Z\s.!?]', '', raw_text)
-    # Normalize whitespace
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip()
+    cleaned_text = clean_text(raw_text)
     
-    logger.info(f"Transcript formatting complete. Cleaned text length: {len(cleaned_text)} characters")
+    logger.info("Transcript formatting complete. Cleaned text length: %d characters", len(cleaned_text))
     return cleaned_text
+
+def format_srt(snippets: list[dict], first_index: int = 1) -> str:
+    """SRT blocks for snippets given as {"text", "start", "duration"} dicts, numbered from first_index."""
+    lines = []
+    for idx, snippet in enumerate(snippets, start=first_index):
+        start_time = format_timestamp(snippet["start"])
+        end_time = format_timestamp(snippet["start"] + snippet["duration"])
+        lines.append(f"{idx}\n{start_time} --> {end_time}\n{snippet['text']}\n")
+    return "\n".join(lines)
@@ -0,0 +1,91 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+# Mapped by transcript_service onto 404/403 responses; anything else becomes a 500
+UPSTREAM_FAILURES = ("VideoUnavailable", "TranscriptsDisabled", "NoTranscriptFound", "RequestBlocked")
+
+_WORDS = (
+    "the quick brown fox jumps over a lazy dog while we talk about caching "
+    "latency throughput redis postgres workers requests and transcripts"
+).split()
+
+
+@dataclass
+class FakeSnippet:
+    text: str
+    start: float
+    duration: float
+
+
+@dataclass
+class FakeFetchedTranscript:
+    video_id: str
+    language: str
+    language_code: str
+    is_generated: bool = False
+    snippets: list[FakeSnippet] = field(default_factory=list)
+
+
+class FakeUpstreamError(Exception):
+    pass
+
+
+class FakeYouTubeTranscriptApi:
+    """
+    Drop-in for `YouTubeTranscriptApi` used by the benchmarks. Blocks the
+    calling thread like the real client; all knobs are class attributes set
+    from the command line.
+    """
+
+    latency_ms: float = 300.0
+    jitter_ms: float = 100.0
+    snippets: int = 400
+    words_per_snippet: int = 10
+    error_rate: float = 0.0
+    # Like YouTube's throttle: more fetches than this per second from one
+    # egress (a proxy, or "direct") raise RequestBlocked. 0 disables it.
+    egress_rps: float = 0.0
+
+    _egress_lock = threading.Lock()
+    _egress_windows: dict = defaultdict(lambda: [0.0, 0])  # egress -> [window start, fetches]
+
+    def __init__(self, proxy_config=None, http_client=None):
+        self.egress = getattr(proxy_config, "http_url", None) or "direct"
+
+    def _throttle(self, video_id: str):
+        cls = type(self)
+        with cls._egress_lock:
+            window = cls._egress_windows[self.egress]
+            now = time.monotonic()
+            if now - window[0] >= 1.0:
+                window[:] = [now, 0]
+            window[1] += 1
+            blocked = window[1] > cls.egress_rps
+        if blocked:
+            raise FakeUpstreamError(f"RequestBlocked: {self.egress} throttled while fetching {video_id}")
+
+    def fetch(self, video_id: str, languages=("en",), preserve_formatting: bool = False) -> FakeFetchedTranscript:
+        cls = type(self)
+        if cls.egress_rps:
+            self._throttle(video_id)
+        delay = max(0.0, cls.latency_ms + random.uniform(-cls.jitter_ms, cls.jitter_ms)) / 1000
+        time.sleep(delay)
+
+        if cls.error_rate and random.random() < cls.error_rate:
+            kind = random.choice(UPSTREAM_FAILURES)
+            raise FakeUpstreamError(f"{kind}: simulated failure for {video_id}")
+
+        # Same video, same text: cache hits and misses return identical payloads
+        rng = random.Random(video_id)
+        language_code = languages[0] if languages else "en"
+        transcript = FakeFetchedTranscript(video_id=video_id, language="English", language_code=language_code)
+        start = 0.0
+        for _ in range(cls.snippets):
+            duration = round(rng.uniform(1.5, 5.0), 3)
+            text = " ".join(rng.choice(_WORDS) for _ in range(cls.words_per_snippet))
+            transcript.snippets.append(FakeSnippet(text=text, start=start, duration=duration))
+            start = round(start + duration, 3)
+        return transcript
@@ -0,0 +1,367 @@
+"""
+In-process load test for the hot API paths.
+
+    python -m benchmarks.run --requests 1000 --concurrency 50 --hit-ratios 1,0.9,0 --output before.json
+
+The app runs inside this process behind httpx's ASGI transport, with the
+YouTube client replaced by `FakeYouTubeTranscriptApi`, fakeredis (or
+--redis-url) and a throwaway SQLite file (or --database-url). The report is
+JSON so runs can be diffed before and after a change.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+SCENARIOS = ("guest_transcripts", "user_transcripts", "login", "admin_stats")
+BENCH_PASSWORD = "bench-password-123"
+CLIENT_IP_HEADER = "x-bench-client-ip"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the API in-process against local stand-ins.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="requests in flight")
+    parser.add_argument("--hit-ratios", default="0.9",
+                        help="comma-separated cache-hit fractions; transcript scenarios run once per value")
+    parser.add_argument("--warm-videos", type=int, default=50, help="videos pre-cached for hits")
+    parser.add_argument("--users", type=int, default=20, help="authenticated users to spread load over")
+    parser.add_argument("--guest-ips", type=int, default=200, help="distinct guest IPs to spread load over")
+    parser.add_argument("--upstream-latency-ms", type=float, default=300.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-egress-rps", type=float, default=0.0,
+                        help="fake YouTube blocks an egress IP above this many fetches per second (0: never)")
+    parser.add_argument("--upstream-proxies", type=int, default=0,
+                        help="route upstream fetches through this many stand-in proxies "
+                             "(the fake client only records which one was used)")
+    parser.add_argument("--transcript-snippets", type=int, default=400, help="snippets per fake transcript")
+    parser.add_argument("--words-per-snippet", type=int, default=10)
+    parser.add_argument("--redis-url", help="use a real Redis instead of fakeredis (keys are not cleaned up)")
+    parser.add_argument("--cache-shards", type=int, default=0,
+                        help="spread the transcript cache over this many fakeredis servers "
+                             "(with --redis-url, export REDIS_CACHE_NODES instead)")
+    parser.add_argument("--database-url", help="use a real database instead of a temporary SQLite file")
+    parser.add_argument("--scenario-timeout", type=float, default=120.0,
+                        help="seconds before a scenario is abandoned; unfinished requests are "
+                             "reported as ScenarioTimeout")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+# ---------------------------
+# Environment
+# ---------------------------
+def configure_environment(args: argparse.Namespace):
+    """Must run before anything under `app` is imported: settings are read at import time."""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='transcripto-bench-')}/bench.db"
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    elif args.cache_shards:
+        # Placeholders that give each shard its ring position; the clients are swapped below
+        os.environ["REDIS_CACHE_NODES"] = ",".join(
+            f"redis://cache-shard-{i}:6379/0" for i in range(args.cache_shards)
+        )
+
+    if args.upstream_proxies:
+        os.environ["UPSTREAM_PROXIES"] = ",".join(
+            f"http://bench-proxy-{i}:3128" for i in range(args.upstream_proxies)
+        )
+
+    # Measure the request path, not the quotas (export these to benchmark rejections)
+    os.environ.setdefault("GUEST_DAILY_LIMIT", str(10 ** 9))
+    os.environ.setdefault("RATE_LIMITS", "USER=1000000000/1,ADMIN=1000000000/1")
+    # Background jobs would compete with the measured requests (and are Postgres-only)
+    os.environ.setdefault("AUDIT_RETENTION_INTERVAL_SECONDS", "0")
+    os.environ.setdefault("GUEST_USAGE_SYNC_INTERVAL_SECONDS", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    # Patched before the app imports it
+    import youtube_transcript_api
+    from benchmarks.fakes import FakeYouTubeTranscriptApi
+
+    FakeYouTubeTranscriptApi.latency_ms = args.upstream_latency_ms
+    FakeYouTubeTranscriptApi.jitter_ms = args.upstream_jitter_ms
+    FakeYouTubeTranscriptApi.error_rate = args.upstream_error_rate
+    FakeYouTubeTranscriptApi.egress_rps = args.upstream_egress_rps
+    FakeYouTubeTranscriptApi.snippets = args.transcript_snippets
+    FakeYouTubeTranscriptApi.words_per_snippet = args.words_per_snippet
+    youtube_transcript_api.YouTubeTranscriptApi = FakeYouTubeTranscriptApi
+
+    if not args.redis_url:
+        import fakeredis
+        import app.core.redis
+
+        server = fakeredis.FakeServer()
+        app.core.redis.r.use(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+        app.core.redis.rb.use(fakeredis.FakeAsyncRedis(server=server))
+
+        from app.core import cache_shards
+
+        for shard in cache_shards.shards:
+            shard.client.use(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+
+
+def _add_sqlite_shims(engine):
+    """SQLite has no date_trunc; give it one so /admin/stats runs unchanged."""
+    from sqlalchemy import DateTime, event
+    from sqlalchemy.sql.functions import GenericFunction
+
+    class date_trunc(GenericFunction):  # noqa: N801 - registers func.date_trunc
+        type = DateTime()
+        inherit_cache = True
+
+    formats = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00", "month": "%Y-%m-01 00:00:00"}
+
+    def _date_trunc(unit, value):
+        if value is None:
+            return None
+        return datetime.fromisoformat(value).strftime(formats.get(unit, "%Y-%m-%d %H:%M:%S"))
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_conn, _record):
+        dbapi_conn.create_function("date_trunc", 2, _date_trunc)
+
+    engine.dispose()  # connections opened before the listener existed lack the function
+
+
+def _with_client_ip(asgi_app):
+    """Let the driver pick the guest IP per request (guests are limited and counted by IP)."""
+    header = CLIENT_IP_HEADER.encode()
+
+    async def wrapped(scope, receive, send):
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == header:
+                    scope = dict(scope, client=(value.decode(), 0))
+                    break
+        await asgi_app(scope, receive, send)
+
+    return wrapped
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+def seed_users(count: int, run_id: str) -> tuple[list[str], str]:
+    """Create verified users plus one admin straight in the database; returns their emails."""
+    from app.core.database import SessionLocal
+    from app.models.user import User, UserRole
+    from app.utils.security import hash_password
+
+    password_hash = hash_password(BENCH_PASSWORD)  # one bcrypt run, shared by every account
+    emails = [f"bench-{run_id}-{i}@bench.transcripto.dev" for i in range(count)]
+    admin_email = f"bench-{run_id}-admin@bench.transcripto.dev"
+    with SessionLocal() as db:
+        for email in emails:
+            db.add(User(name="Bench User", email=email, password_hash=password_hash,
+                        is_verified=True, role=UserRole.USER))
+        db.add(User(name="Bench Admin", email=admin_email, password_hash=password_hash,
+                    is_verified=True, role=UserRole.ADMIN))
+        db.commit()
+    return emails, admin_email
+
+
+async def login(client, email: str) -> str:
+    response = await client.post("/auth/login", json={"email": email, "password": BENCH_PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+# ---------------------------
+# Load driver
+# ---------------------------
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+async def drive(name: str, total: int, concurrency: int, send, timeout: float | None = None) -> dict:
+    """
+    Run `send(i)` for i in range(total) with `concurrency` requests in flight.
+    A scenario still running after `timeout` seconds is cancelled and its
+    unfinished requests are counted as ScenarioTimeout, so one stalled
+    endpoint cannot hang the whole run.
+    """
+    pending = iter(range(total))
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async def worker():
+        for i in pending:
+            started = time.perf_counter()
+            try:
+                response = await send(i)
+                statuses[str(response.status_code)] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.gather(*(worker() for _ in range(concurrency))), timeout)
+    except asyncio.TimeoutError:
+        timed_out = True
+        statuses["ScenarioTimeout"] += total - sum(statuses.values())
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "timed_out": timed_out,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "success_rate": round(ok / total, 4) if total else 0.0,
+        "status_counts": dict(statuses),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 50), 3),
+            "p95": round(_percentile(latencies, 95), 3),
+            "p99": round(_percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.core.database import get_engine
+    from app.main import app
+
+    engine = get_engine()
+    if engine.dialect.name == "sqlite":
+        _add_sqlite_shims(engine)
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    hit_ratios = [float(v) for v in args.hit_ratios.split(",")]
+
+    run_id = uuid.uuid4().hex[:8]
+    rng = random.Random(args.seed)
+    results = []
+
+    transport = httpx.ASGITransport(app=_with_client_ip(app))
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            emails, admin_email = await asyncio.to_thread(seed_users, args.users, run_id)
+            tokens = [await login(client, email) for email in emails]
+            admin_token = await login(client, admin_email)
+            guest_ips = [f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}" for i in range(args.guest_ips)]
+
+            # Pre-fill the cache so "hits" really are hits (without injected failures)
+            from benchmarks.fakes import FakeYouTubeTranscriptApi
+
+            warm_videos = [f"warm-{run_id}-{i}" for i in range(args.warm_videos)]
+            auth = {"Authorization": f"Bearer {tokens[0]}"}
+            FakeYouTubeTranscriptApi.error_rate = FakeYouTubeTranscriptApi.egress_rps = 0.0
+            for video_id in warm_videos:
+                await client.get("/v1/transcripts", params={"video_id": video_id}, headers=auth)
+            FakeYouTubeTranscriptApi.error_rate = args.upstream_error_rate
+            FakeYouTubeTranscriptApi.egress_rps = args.upstream_egress_rps
+
+            def pick_video(hit_ratio: float, label: str, i: int) -> str:
+                if warm_videos and rng.random() < hit_ratio:
+                    return rng.choice(warm_videos)
+                return f"miss-{run_id}-{label}-{i}"
+
+            for hit_ratio in hit_ratios:
+                label = f"hit={hit_ratio:g}"
+                if "guest_transcripts" in scenarios:
+                    async def guest(i, hit_ratio=hit_ratio, label=label):
+                        return await client.get(
+                            "/v1/transcripts",
+                            params={"video_id": pick_video(hit_ratio, "g" + label, i)},
+                            headers={CLIENT_IP_HEADER: rng.choice(guest_ips)},
+                        )
+                    result = await drive("guest_transcripts", args.requests, args.concurrency, guest, args.scenario_timeout)
+                    results.append(dict(result, hit_ratio=hit_ratio))
+
+                if "user_transcripts" in scenarios:
+                    async def user(i, hit_ratio=hit_ratio, label=label):
+                        return await client.get(
+                            "/v1/transcripts",
+                            params={"video_id": pick_video(hit_ratio, "u" + label, i)},
+                            headers={"Authorization": f"Bearer {rng.choice(tokens)}"},
+                        )
+                    result = await drive("user_transcripts", args.requests, args.concurrency, user, args.scenario_timeout)
+                    results.append(dict(result, hit_ratio=hit_ratio))
+
+            if "login" in scenarios:
+                async def do_login(i):
+                    return await client.post(
+                        "/auth/login", json={"email": rng.choice(emails), "password": BENCH_PASSWORD}
+                    )
+                results.append(await drive("login", args.requests, args.concurrency, do_login, args.scenario_timeout))
+
+            if "admin_stats" in scenarios:
+                async def stats(i):
+                    return await client.get("/admin/stats", headers={"Authorization": f"Bearer {admin_token}"})
+                results.append(await drive("admin_stats", args.requests, args.concurrency, stats, args.scenario_timeout))
+
+    return {"meta": _meta(args, run_id), "results": results}
+
+
+def _meta(args: argparse.Namespace, run_id: str) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "run_id": run_id,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "redis": "real" if args.redis_url else "fakeredis",
+        "config": vars(args),
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    configure_environment(args)
+    # Keep stdout clean for the report; the app prints during bootstrap
+    with contextlib.redirect_stdout(sys.stderr):
+        report = asyncio.run(run(args))
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(body + "\n")
+    else:
+        sys.stdout.write(body + "\n")
+
+    stalled = [result["scenario"] for result in report["results"] if result["timed_out"]]
+    if stalled:
+        # The report is still written; the exit status lets scripts notice
+        sys.exit(f"Scenarios timed out: {', '.join(stalled)}")
+
+
+if __name__ == "__main__":
+    main()
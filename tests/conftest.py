@@ -0,0 +1,28 @@
+"""
+Shared fixtures. Settings are read when `app` modules are imported, so the
+environment is set here, before any test module imports them.
+"""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='transcripto-test-')}/test.db")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def fake_redis():
+    """A fresh in-memory Redis (Lua scripts run through lupa) behind app.core.redis.r and rb."""
+    import fakeredis
+    from app.core.redis import r, rb
+
+    server = fakeredis.FakeServer()
+    r.use(fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+    rb.use(fakeredis.FakeAsyncRedis(server=server))
+    return server
@@ -0,0 +1,110 @@
+import asyncio
+from collections import Counter
+
+import fakeredis
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core import cache_shards
+from app.core.cache_shards import HashRing, Shard, on_shard
+from app.core.config import REDIS_CACHE_FAILURE_THRESHOLD
+from app.services.cache_service import CacheService, compress_variants
+
+KEYS = [f"transcript:key-{i}" for i in range(20_000)]
+
+
+def _shards(n: int) -> list[Shard]:
+    return [Shard(f"redis://cache-{i}:6379/0") for i in range(n)]
+
+
+def test_adding_a_node_moves_about_one_nth_of_the_keys():
+    shards = _shards(4)
+    before = HashRing(shards[:3], 160)
+    after = HashRing(shards, 160)
+
+    moved = [key for key in KEYS if before.shard_for(key) is not after.shard_for(key)]
+    assert 0.18 < len(moved) / len(KEYS) < 0.32
+    # Keys only move onto the new node, never between the old ones
+    assert all(after.shard_for(key) is shards[3] for key in moved)
+
+
+def test_keys_spread_evenly():
+    ring = HashRing(_shards(3), 160)
+    counts = Counter(ring.shard_for(key).name for key in KEYS)
+    assert min(counts.values()) > len(KEYS) / 3 * 0.8
+
+
+@pytest.fixture
+def ring(monkeypatch):
+    """Two in-memory cache nodes; the second one is down."""
+    live, dead = _shards(2)
+    live.client.use(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+    dead_server = fakeredis.FakeServer()
+    dead_server.connected = False
+    dead.client.use(fakeredis.FakeAsyncRedis(server=dead_server))
+    monkeypatch.setattr(cache_shards, "ring", HashRing([live, dead], 160))
+    return live, dead
+
+
+def _video_on(shard: Shard) -> str:
+    return next(
+        video_id for video_id in (f"video-{i}" for i in range(1000))
+        if cache_shards.shard_for(CacheService._build_key(video_id, "en")) is shard
+    )
+
+
+@pytest.mark.anyio
+async def test_dead_shard_reads_miss_and_writes_are_dropped(ring):
+    live, dead = ring
+    fields = compress_variants(b"body")
+
+    video_id = _video_on(dead)
+    await CacheService.set_transcript(video_id, "en", fields)
+    assert await CacheService.get_transcript(video_id, "en", ["identity"]) is None
+    assert await CacheService.get_index(video_id, "en") is None
+    assert dead.failures == 3
+
+    video_id = _video_on(live)
+    await CacheService.set_transcript(video_id, "en", fields)
+    assert await CacheService.get_transcript(video_id, "en", ["identity"]) == ("identity", b"body")
+    assert await CacheService.are_cached([video_id, _video_on(dead)], "en") == [True, False]
+
+
+@pytest.mark.anyio
+async def test_breaker_trips_after_consecutive_failures(ring):
+    _, dead = ring
+    for _ in range(REDIS_CACHE_FAILURE_THRESHOLD - 1):
+        assert await on_shard(dead, lambda client: client.get("k"), "miss") == "miss"
+        assert dead.available
+    await on_shard(dead, lambda client: client.get("k"), "miss")
+    assert not dead.available
+
+
+@pytest.mark.anyio
+async def test_success_resets_the_failure_count():
+    shard = _shards(1)[0]
+    shard.client.use(fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer()))
+
+    async def fail(client):
+        raise RedisConnectionError("Connection reset by peer")
+
+    for _ in range(REDIS_CACHE_FAILURE_THRESHOLD - 1):
+        await on_shard(shard, fail, None)
+    await on_shard(shard, lambda client: client.get("k"), None)
+    assert shard.failures == 0
+    await on_shard(shard, fail, None)
+    assert shard.available
+
+
+@pytest.mark.anyio
+async def test_pool_exhaustion_does_not_trip_the_breaker():
+    shard = _shards(1)[0]
+
+    async def exhausted(client):
+        # What BlockingConnectionPool raises when no connection frees up in time
+        raise RedisConnectionError("No connection available.") from asyncio.TimeoutError()
+
+    for _ in range(REDIS_CACHE_FAILURE_THRESHOLD * 3):
+        assert await on_shard(shard, exhausted, "miss") == "miss"
+    assert shard.failures == 0
+    assert shard.available
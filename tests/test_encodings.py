@@ -0,0 +1,53 @@
+import gzip
+
+import pytest
+
+from app.services.cache_service import CacheService, accepted_encodings, brotli, compress_variants
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, ["identity"]),
+    ("", ["identity"]),
+    ("gzip", ["gzip", "identity"]),
+    # Equal q-values keep the server preference order
+    ("gzip, br", ["br", "gzip", "identity"]),
+    ("gzip;q=1.0, br;q=0.5", ["gzip", "br", "identity"]),
+    ("BR ; q=0.8, Gzip", ["gzip", "br", "identity"]),
+    # q=0 means "not acceptable"
+    ("br;q=0, gzip", ["gzip", "identity"]),
+    ("gzip;q=0", ["identity"]),
+    ("gzip;q=abc", ["identity"]),
+    # The wildcard covers every coding not listed explicitly
+    ("*", ["br", "gzip", "identity"]),
+    ("*;q=0.5, gzip", ["gzip", "br", "identity"]),
+    ("*, br;q=0", ["gzip", "identity"]),
+    ("*;q=0", ["identity"]),
+    # The uncompressed body is always the last resort, even when refused
+    ("gzip, identity;q=0", ["gzip", "identity"]),
+    ("identity;q=0", ["identity"]),
+])
+def test_accepted_encodings(header, expected):
+    assert accepted_encodings(header) == expected
+
+
+async def test_cache_returns_the_best_stored_variant(fake_redis):
+    body = b'{"status": "success"}' * 50
+    await CacheService.set_transcript("vid", "default", compress_variants(body))
+
+    found = await CacheService.get_transcript("vid", "default", accepted_encodings("gzip, br"))
+    if brotli is not None:
+        assert found.encoding == "br"
+        assert brotli.decompress(found.body) == body
+    else:
+        assert found.encoding == "gzip"
+
+    found = await CacheService.get_transcript("vid", "default", accepted_encodings("gzip"))
+    assert found.encoding == "gzip"
+    assert gzip.decompress(found.body) == body
+
+    found = await CacheService.get_transcript("vid", "default", accepted_encodings("identity;q=0"))
+    assert found == ("identity", body)
+
+    assert await CacheService.get_transcript("other", "default", ["identity"]) is None
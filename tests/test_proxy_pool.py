@@ -0,0 +1,106 @@
+import pytest
+
+from app.core import proxy_pool as proxy_pool_module
+from app.core.proxy_pool import DIRECT, ProxyPool
+
+pytestmark = pytest.mark.anyio
+
+PROXIES = ["http://proxy-a:3128", "http://proxy-b:3128"]
+
+
+# Matched by name, like the youtube_transcript_api exceptions
+class RequestBlocked(Exception):
+    pass
+
+
+class VideoUnavailable(Exception):
+    pass
+
+
+def _scripted(*results):
+    """A blocking fetch that plays `results` in order (exceptions are raised) and records the proxy of each call."""
+    calls = []
+    pending = list(results)
+
+    def fetch(proxy_config):
+        calls.append(proxy_config.http_url if proxy_config else DIRECT)
+        result = pending.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    return fetch, calls
+
+
+def _egress(pool: ProxyPool, url: str):
+    return next(egress for egress in pool.egresses if egress.url == url)
+
+
+async def test_retries_stay_on_the_same_egress(monkeypatch):
+    monkeypatch.setattr(proxy_pool_module, "UPSTREAM_FETCH_RETRIES", 2)
+    pool = ProxyPool(PROXIES)
+    fetch, calls = _scripted(OSError("reset"), OSError("reset"), "transcript")
+
+    assert await pool.fetch(fetch) == "transcript"
+    assert len(calls) == 3 and len(set(calls)) == 1
+    egress = _egress(pool, calls[0])
+    assert (egress.attempts, egress.errors, egress.blocks) == (3, 2, 0)
+    assert not egress.cooling_down
+    assert egress.in_flight == 0
+
+
+async def test_gives_up_after_the_retries(monkeypatch):
+    monkeypatch.setattr(proxy_pool_module, "UPSTREAM_FETCH_RETRIES", 1)
+    pool = ProxyPool(PROXIES)
+    fetch, calls = _scripted(OSError("reset"), OSError("timed out"))
+
+    with pytest.raises(OSError, match="timed out"):
+        await pool.fetch(fetch)
+    assert len(calls) == 2 and len(set(calls)) == 1
+
+
+async def test_block_cools_the_egress_down_and_fails_over():
+    pool = ProxyPool(PROXIES)
+    fetch, calls = _scripted(RequestBlocked("blocked"), "transcript")
+
+    assert await pool.fetch(fetch) == "transcript"
+    blocked, other = calls
+    assert blocked != other
+    assert _egress(pool, blocked).cooling_down
+    assert _egress(pool, blocked).blocks == 1
+    assert not _egress(pool, other).cooling_down
+
+    # New requests avoid the egress while it cools down
+    for _ in range(10):
+        fetch, calls = _scripted("transcript")
+        await pool.fetch(fetch)
+        assert calls == [other]
+
+
+async def test_block_with_nowhere_to_go_raises():
+    pool = ProxyPool(PROXIES[:1])
+    fetch, calls = _scripted(RequestBlocked("blocked"))
+
+    with pytest.raises(RequestBlocked):
+        await pool.fetch(fetch)
+    assert len(calls) == 1
+    assert pool.egresses[0].cooling_down
+
+
+async def test_video_errors_do_not_count_against_the_egress():
+    pool = ProxyPool(PROXIES)
+    fetch, calls = _scripted(VideoUnavailable("gone"))
+
+    with pytest.raises(VideoUnavailable):
+        await pool.fetch(fetch)
+    assert len(calls) == 1  # not retried: another attempt would get the same answer
+    egress = _egress(pool, calls[0])
+    assert (egress.attempts, egress.errors, egress.error_rate) == (1, 0, 0.0)
+    assert not egress.cooling_down
+
+
+async def test_without_proxies_fetches_go_direct():
+    pool = ProxyPool([])
+    fetch, calls = _scripted("transcript")
+    assert await pool.fetch(fetch) == "transcript"
+    assert calls == [DIRECT]
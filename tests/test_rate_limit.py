@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter, _token_bucket
+
+pytestmark = pytest.mark.anyio
+
+
+async def _take(key: str, capacity: int, rate: float, cost: int = 1):
+    allowed, tokens, retry_after, reset = await _token_bucket(keys=[key], args=[capacity, rate, cost])
+    return int(allowed), float(tokens), float(retry_after), float(reset)
+
+
+async def test_bucket_starts_full_and_empties(fake_redis):
+    assert (await _take("bucket", 2, 1))[:2] == (1, 1.0)
+    assert (await _take("bucket", 2, 1))[0] == 1
+    allowed, tokens, retry_after, _ = await _take("bucket", 2, 1)
+    assert allowed == 0
+    assert tokens < 1
+    assert 0.9 < retry_after <= 1.0
+
+
+async def test_bucket_refills_over_time(fake_redis):
+    for _ in range(2):
+        await _take("bucket", 2, 20)
+    assert (await _take("bucket", 2, 20))[0] == 0
+
+    await asyncio.sleep(0.1)  # 20 tokens/s: two tokens back, capped at capacity
+    assert (await _take("bucket", 2, 20))[0] == 1
+    assert (await _take("bucket", 2, 20))[0] == 1
+    assert (await _take("bucket", 2, 20))[0] == 0
+
+
+async def test_bucket_rejects_costs_above_the_balance(fake_redis):
+    allowed, tokens, retry_after, _ = await _take("bucket", 5, 1, cost=7)
+    assert allowed == 0
+    assert tokens == 5.0
+    assert retry_after == pytest.approx(2.0, abs=0.01)
+
+
+async def test_rate_limiter_sets_headers_and_retry_after(fake_redis, monkeypatch):
+    monkeypatch.setitem(rate_limit.RATE_LIMITS, "USER", (2, 60))
+    limiter = RateLimiter("history")
+    user = {"sub": "42", "role": "USER"}
+
+    request = Request({"type": "http", "headers": []})
+    await limiter(request, current_user=user)
+    assert request.state.rate_limit_headers["X-RateLimit-Limit"] == "2"
+    assert request.state.rate_limit_headers["X-RateLimit-Remaining"] == "1"
+    await limiter(Request({"type": "http", "headers": []}), current_user=user)
+
+    with pytest.raises(HTTPException) as exc:
+        await limiter(Request({"type": "http", "headers": []}), current_user=user)
+    assert exc.value.status_code == 429
+    # One token at 2 per 60s is 30s away
+    assert exc.value.headers["Retry-After"] == "30"
+    assert exc.value.headers["X-RateLimit-Remaining"] == "0"
+
+
+async def test_rate_limiter_skips_guests_and_separates_scopes(fake_redis, monkeypatch):
+    monkeypatch.setitem(rate_limit.RATE_LIMITS, "USER", (1, 60))
+    user = {"sub": "42", "role": "USER"}
+
+    await RateLimiter("history")(Request({"type": "http", "headers": []}), current_user=None)
+    await RateLimiter("history")(Request({"type": "http", "headers": []}), current_user=user)
+    await RateLimiter("export")(Request({"type": "http", "headers": []}), current_user=user)
+    with pytest.raises(HTTPException):
+        await RateLimiter("history")(Request({"type": "http", "headers": []}), current_user=user)
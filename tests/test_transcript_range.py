@@ -0,0 +1,84 @@
+import pytest
+
+from app.services.cache_service import CHUNK_SIZE, CacheService, TranscriptIndex, index_fields
+from app.services.transcript_service import _locate
+
+META = {"language": "English", "language_code": "en"}
+
+
+def _snippets(*timings):
+    return [{"text": f"s{i}", "start": start, "duration": duration} for i, (start, duration) in enumerate(timings)]
+
+
+def _index(snippets) -> TranscriptIndex:
+    fields = index_fields(META, snippets)
+    return TranscriptIndex.decode(fields["meta"], fields["starts"], fields["ends"])
+
+
+# A long caption (0-10s) overlapping three short ones, then a gap
+OVERLAPPING = _snippets((0, 10), (2, 1), (4, 1), (12, 2))
+
+
+@pytest.mark.parametrize("start, end, offset, limit, expected", [
+    (None, None, 0, None, (0, 4, 4)),
+    # Still running at 5s: the long caption counts, and the range is contiguous from there
+    (5, 13, 0, None, (0, 4, 4)),
+    (10.5, None, 0, None, (3, 4, 1)),
+    (None, 3, 0, None, (0, 2, 2)),
+    (None, 3, 1, 5, (1, 2, 2)),
+    (5, 13, 1, 2, (1, 3, 4)),
+    # Nothing starts before `end`, or the range is inverted
+    (None, 0, 0, None, (0, 0, 0)),
+    (12.5, 5, 0, None, (3, 3, 0)),
+    (20, None, 0, None, (4, 4, 0)),
+    # An offset past the end is an empty page of the same range
+    (5, 13, 10, None, (4, 4, 4)),
+    (None, None, 4, 1, (4, 4, 4)),
+    (None, None, 0, 0, (0, 0, 4)),
+])
+def test_locate(start, end, offset, limit, expected):
+    index = _index(OVERLAPPING)
+    assert _locate(index.starts, index.ends, start, end, offset, limit) == expected
+
+
+def test_index_ends_is_the_running_maximum():
+    assert list(_index(OVERLAPPING).ends) == [10, 10, 10, 14]
+    assert _index(OVERLAPPING).meta == dict(META, snippets=4)
+
+
+@pytest.fixture
+async def cached(fake_redis):
+    snippets = _snippets(*((i, 1.5) for i in range(2 * CHUNK_SIZE + 50)))
+    await CacheService.set_transcript("vid", "en", index_fields(META, snippets))
+    return snippets
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("lo, hi", [
+    (0, 1),
+    (CHUNK_SIZE - 1, CHUNK_SIZE),
+    (CHUNK_SIZE - 1, CHUNK_SIZE + 1),
+    (CHUNK_SIZE, CHUNK_SIZE + 1),
+    (0, CHUNK_SIZE),
+    (CHUNK_SIZE - 5, 2 * CHUNK_SIZE + 5),
+    (2 * CHUNK_SIZE, 2 * CHUNK_SIZE + 50),
+    (0, 2 * CHUNK_SIZE + 50),
+])
+async def test_get_snippets_across_chunk_boundaries(cached, lo, hi):
+    assert await CacheService.get_snippets("vid", "en", lo, hi) == cached[lo:hi]
+
+
+@pytest.mark.anyio
+async def test_get_snippets_empty_and_missing(cached):
+    assert await CacheService.get_snippets("vid", "en", 5, 5) == []
+    assert await CacheService.get_snippets("other", "en", 0, 1) is None
+    # Past the last chunk reads as an expired entry, never as a short page
+    assert await CacheService.get_snippets("vid", "en", 0, 3 * CHUNK_SIZE + 1) is None
+
+
+@pytest.mark.anyio
+async def test_located_slice_matches_the_full_list(cached):
+    index = await CacheService.get_index("vid", "en")
+    lo, hi, total = _locate(index.starts, index.ends, 150.2, 260, 10, 100)
+    assert total == len([s for s in cached if s["start"] + s["duration"] > 150.2 and s["start"] < 260])
+    assert await CacheService.get_snippets("vid", "en", lo, hi) == cached[lo:hi]
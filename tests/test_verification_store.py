@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.redis import r
+from app.services.verification_store import VerificationStore
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_missing_when_never_issued(fake_redis):
+    assert await VerificationStore.verify(1, "123456", max_attempts=5) == "missing"
+
+
+async def test_ok_consumes_the_code(fake_redis):
+    code = await VerificationStore.issue(1, ttl_seconds=60)
+    assert await VerificationStore.verify(1, code, max_attempts=5) == "ok"
+    assert await VerificationStore.verify(1, code, max_attempts=5) == "missing"
+
+
+async def test_invalid_counts_attempts_until_too_many(fake_redis):
+    code = await VerificationStore.issue(1, ttl_seconds=60)
+    wrong = f"{(int(code) + 1) % 1_000_000:06d}"
+    assert await VerificationStore.verify(1, wrong, max_attempts=2) == "invalid"
+    assert await VerificationStore.verify(1, wrong, max_attempts=2) == "invalid"
+    # Out of attempts: even the right code is refused, and the code is gone
+    assert await VerificationStore.verify(1, code, max_attempts=2) == "too_many"
+    assert await VerificationStore.verify(1, code, max_attempts=2) == "missing"
+
+
+async def test_issuing_replaces_the_previous_code(fake_redis, monkeypatch):
+    codes = iter(["111111", "222222"])
+    monkeypatch.setattr(VerificationStore, "_new_code", staticmethod(lambda: next(codes)))
+    await VerificationStore.issue(1, ttl_seconds=60)
+    await VerificationStore.issue(1, ttl_seconds=60)
+    assert await VerificationStore.verify(1, "111111", max_attempts=5) == "invalid"
+    assert await VerificationStore.verify(1, "222222", max_attempts=5) == "ok"
+
+
+async def test_code_expires(fake_redis):
+    await VerificationStore.issue(1, ttl_seconds=60)
+    assert 0 < await r.ttl(VerificationStore._key(1)) <= 60